@@ -1,10 +1,19 @@
 import math
 import time
 import pygame as pg
-from abyss_utils import circle_rect_collision
+import numpy as np
+from abyss_utils import TargetPack, circle_rects_collision
+from entity_store import take_damage_many
+from object_pool import ObjectPool
 
 class AOEAttack:
+    __slots__ = ("caster", "generated_pos", "base_radius", "multiplier", "target_type", "start_time",
+                 "lifetime", "inner_radius", "dr", "prev_time", "radius", "applied", "retired")
+
     def __init__(self, caster, generated_pos, base_radius=48, multiplier=1.5, target_type="enemy"):
+        self.reset(caster, generated_pos, base_radius, multiplier, target_type)
+
+    def reset(self, caster, generated_pos, base_radius=48, multiplier=1.5, target_type="enemy"):
         self.caster = caster
         self.generated_pos = generated_pos
         self.base_radius = base_radius
@@ -17,22 +26,58 @@ class AOEAttack:
         self.prev_time = time.time()
 
         # Final radius with scroll amplifier
-        amp = caster.amplifiers.get("aoe", 0)
+        amp = caster.aoe_amp
         self.radius = base_radius + amp
+        # Pooled AOEs are released once both drawn out and applied; the caster's pending cast
+        # still refers to the AOE until it has dealt its damage
+        self.applied = False
+        self.retired = False
+
+    def apply_to_targets(self, targets, spatial_hash=None):
+        # Damage is the same for every victim, so work it out once
+        final_dmg = self.caster.attack * self.multiplier * (1 + self.caster.aoe_amp / 100)
+        take_damage_many(self.victims(targets, spatial_hash), final_dmg, self.caster)
+        self.applied = True
+        if self.retired:
+            aoe_pool.release(self)
+
+    def victims(self, targets, spatial_hash=None):
+        """Targets inside the circle and on the other side, in list order, from one array pass.
 
-    def apply_to_targets(self, targets):
+        targets may be a TargetPack already built for this frame.
+        """
+        # With a hash of every live entity, only the targets in buckets under the circle are packed;
+        # the hash may hold entities the caller did not offer, so it only narrows the list
+        if spatial_hash is not None:
+            cx, cy = self.generated_pos
+            r = self.radius
+            near = set(spatial_hash.candidates(cx - r, cy - r, cx + r, cy + r))
+            entities = targets.entities if isinstance(targets, TargetPack) else targets
+            targets = [target for target in entities if target in near]
+        if not isinstance(targets, TargetPack):
+            targets = TargetPack(targets)
+        if not len(targets):
+            return []
 
-        for target in targets:
-            if target.state == "dead":
-                continue
-            if self.target_type == "enemy" and target.team_id == self.caster.team_id:
-                continue
-            if self.target_type == "player" and target.team_id != "player":
-                continue
+        hit = targets.alive.copy()
+        if self.target_type == "enemy":
+            hit &= targets.teams != self.caster.team_id
+        elif self.target_type == "player":
+            hit &= targets.teams == "player"
+        hit &= circle_rects_collision(self.generated_pos, self.radius, *targets.rects())
+        return [targets.entities[i] for i in np.flatnonzero(hit)]
 
-            if circle_rect_collision(self.generated_pos, self.radius, target.get_rect()):
-                final_dmg = self.caster.attack * self.multiplier * (1 + self.caster.amplifiers["aoe"] / 100)
-                target.take_damage(final_dmg, self.caster)
+    def retire(self):
+        self.retired = True
+        if self.applied:
+            aoe_pool.release(self)
+
+    def cancel(self):
+        # The cast will never land (its caster died or the stage was unloaded): settle it as applied
+        if not self.applied:
+            self.applied = True
+            if self.retired:
+                aoe_pool.release(self)
 
     def is_expired(self):
         return time.time() - self.start_time > self.lifetime
@@ -52,3 +97,6 @@ class AOEAttack:
         surface.blit(temp_surface, (cx - radius, cy - radius))
         pg.draw.circle(inner_temp, (*color, alpha), (inner, inner), inner)
         surface.blit(inner_temp, (cx - inner, cy - inner))
+
+
+aoe_pool = ObjectPool(AOEAttack)
@@ -3,6 +3,8 @@ from abyss_enemy import Enemy
 from config import Config
 
 class Boss(Enemy):
+    __slots__ = ("current_phase", "phase2_entered", "phase3_entered")
+
     def __init__(self, spawn_point, size, game_manager=None, stage_level=0):
         super().__init__(spawn_point, size, ai_type="ranged",
                          game_manager=game_manager, stage_level=stage_level)
@@ -1,6 +1,8 @@
 import time
 
 class Buff:
+    __slots__ = ("caster", "buff_type", "value", "duration", "start_time")
+
     def __init__(self, caster, buff_type: str, value: float, duration: float):
         self.caster = caster
         self.buff_type = buff_type
@@ -12,11 +14,7 @@ class Buff:
         return (time.time() - self.start_time) < self.duration
 
     def apply(self):
-        self.caster.active_buffs[self.buff_type] = {
-            "value": self.value,
-            "start_time": self.start_time,
-            "duration": self.duration
-        }
+        self.caster.set_buff(self)
 
     def remaining_time(self):
         return max(0.0, self.duration - (time.time() - self.start_time))
@@ -2,6 +2,8 @@ import pygame as pg
 from config import Config
 
 class Chest:
+    __slots__ = ("position", "scroll", "opened", "size", "rect")
+
     def __init__(self, position, scroll):
         self.position = position
         self.scroll = scroll  # one of "projectile", "aoe", "buff"
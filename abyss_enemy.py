@@ -2,20 +2,29 @@ import time
 import math
 import pygame as pg
 from abyss_entity import Entity
+from entity_store import EntityStore
 from config import Config
 
 class Enemy(Entity):
+    __slots__ = ("ai_type", "last_decision_time", "decision_delay", "game", "path", "path_index", "path_plan",
+                 "path_request", "path_update_timer", "path_update_interval", "goal_boundary_center",
+                 "last_tile", "current_tile", "last_goal_tile")
+
     def __init__(self, spawn_point, size, ai_type="melee", game_manager=None, stage_level=0):
         super().__init__(base_health=40, base_attack=10, base_defense=5,
-                         spawn_point=spawn_point, size=size)
+                         spawn_point=spawn_point, size=size,
+                         store=game_manager.entity_store if game_manager else EntityStore())
         self.team_id = "enemy"
         self.ai_type = ai_type
         self.last_decision_time = time.time()
         self.decision_delay = 1.0  # seconds between actions
 
         self.game = game_manager
+        self.map = game_manager.map if game_manager else None
         self.path = []
         self.path_index = 0
+        self.path_plan = None  # HierarchicalPath still being refined into self.path
+        self.path_request = None  # queued PathRequest; the old path is followed until it lands
         self.path_update_timer = 0
         self.path_update_interval = 0.25
         self.goal_boundary_center = None
@@ -23,8 +32,14 @@ class Enemy(Entity):
         self.current_tile = None
         self.last_goal_tile = None
 
+    def die(self):
+        super().die()
+        if self.game:
+            self.game.on_enemy_died(self)
+
     def update(self, player):
         super().update()
+        self.poll_path_request()
         if self.state == Entity.CASTING:
             return None
 
@@ -60,26 +75,10 @@ class Enemy(Entity):
 
             if self.last_goal_tile is None or player_tile != self.last_goal_tile:
                 self.last_goal_tile = player_tile
-                walkables = self.game.map.get_walkable_tiles()
-
-                # Choose target zone based on enemy type
-                if self.ai_type == "melee":
-                    goal_tile = self.get_melee_dest_tile(player_tile, walkables)
-                elif self.ai_type == "ranged":
-                    goal_tile = self.get_ranged_dest_tile(player, player_tile, walkables)
-                else:
-                    goal_tile = player_tile
-
-                if goal_tile is None:
-                    goal_tile = player_tile
 
-                if goal_tile:
-                    self.path = self.game.pathfinder.find_path(self.get_current_tile(), goal_tile)
-                    self.path_index = 0
-
-                    # Optional: remove path reversal
-                    if self.path and len(self.path) >= 2 and self.path[1] == self.last_tile:
-                        self.path.pop(1)
+                # Optional: remove path reversal
+                if self.repath(player, player_tile) and len(self.path) >= 2 and self.path[1] == self.last_tile:
+                    self.path.pop(1)
 
         # Follow path
         if self.path and self.path_index < len(self.path):
@@ -105,9 +104,12 @@ class Enemy(Entity):
                 self.current_tile = self.path[self.path_index]
 
                 self.path_index += 1
+                if self.path_index >= len(self.path) and self.path_plan and not self.path_plan.done:
+                    self.path.extend(self.path_plan.next_segment())
                 self.state = Entity.IDLE
             else:
-                self.move((move_dx / dist_to_next, move_dy / dist_to_next))
+                # Stepped with the other awake enemies in GameManager's movement pass
+                self.steer((move_dx / dist_to_next, move_dy / dist_to_next))
                 self.state = Entity.MOVING
         elif self.state != Entity.CASTING:
             self.state = Entity.IDLE
@@ -118,18 +120,8 @@ class Enemy(Entity):
                 if self.last_goal_tile is None or player_tile != self.last_goal_tile:
                     self.path_update_timer = now
                     self.last_goal_tile = player_tile
-                    walkables = self.game.map.get_walkable_tiles()
-
-                    if self.ai_type == "melee":
-                        goal_tile = self.get_melee_dest_tile(player_tile, walkables)
-                    elif self.ai_type == "ranged":
-                        goal_tile = self.get_ranged_dest_tile(player, player_tile, walkables)
-                    else:
-                        goal_tile = player_tile
 
-                    if goal_tile:
-                        self.path = self.game.pathfinder.find_path(self.get_current_tile(), goal_tile)
-                        self.path_index = 0
+                    self.repath(player, player_tile, fallback_to_player=False)
 
         # At the very end of update()
         if self.pending_projectile:
@@ -168,8 +160,7 @@ class Enemy(Entity):
             ]
 
             if current_tile in yellow_ring and self.can_use_projectile():
-                wall_rects = self.game.map.get_wall_rects()
-                if self.has_line_of_sight_from(self.center, player.center, wall_rects):
+                if self.has_line_of_sight_from(self.center, player.center):
                     direction = (dx / dist, dy / dist) if dist != 0 else (0, 0)
                     return self.use_projectile(direction)
                 else:
@@ -178,6 +169,97 @@ class Enemy(Entity):
 
         return None
 
+    def repath(self, player, player_tile, fallback_to_player=True):
+        """Returns True if a new path was adopted now, False if none or still queued."""
+        # Shared flow field first, A* (through the path cache) as the fallback
+        path = self.get_flow_field_path(player_tile)
+        if path:
+            self.cancel_path_request()
+            self.path = path
+            self.path_index = 0
+            self.path_plan = None
+            return True
+
+        # Choose target zone based on enemy type
+        if self.ai_type == "melee":
+            goal_tile = self.get_melee_dest_tile(player_tile)
+        elif self.ai_type == "ranged":
+            goal_tile = self.get_ranged_dest_tile(player, player_tile)
+        else:
+            goal_tile = player_tile
+
+        if goal_tile is None and fallback_to_player:
+            goal_tile = player_tile
+
+        if goal_tile:
+            path = self.find_path_to(goal_tile)
+            if path is not None:
+                self.path = path
+                self.path_index = 0
+                return bool(path)
+        return False
+
+    def poll_path_request(self):
+        request = self.path_request
+        if request is None or not request.done:
+            return
+        self.path_request = None
+        self.path_plan = None
+
+        # We kept walking while it was queued, so resume from where we are now
+        tile = self.get_current_tile()
+        self.path = request.path
+        self.path_index = self.path.index(tile) if tile in self.path else 0
+
+    def cancel_path_request(self):
+        if self.path_request is not None:
+            self.game.path_queue.cancel(self)
+            self.path_request = None
+
+    def get_flow_field_path(self, player_tile):
+        # Walk the player's flow field until inside this enemy's attack range
+        field = getattr(self.game, "flow_field", None)
+        if field is None or field.origin != player_tile or self.ai_type not in ("melee", "ranged"):
+            return []
+
+        reach = 1 if self.ai_type == "melee" else Config.RANGED_RING_RADIUS
+
+        def in_range(tile):
+            return max(abs(tile[0] - player_tile[0]), abs(tile[1] - player_tile[1])) <= reach
+
+        start = self.get_current_tile()
+        if in_range(start):
+            return []  # already engaged: pick an exact ring tile with A*
+        return field.path_from(start, in_range)
+
+    def find_path_to(self, goal_tile):
+        """New path to goal_tile, or None while it waits in the game's path queue."""
+        # Long trips go through the HPA* planner and are refined hop by hop as we walk
+        start = self.get_current_tile()
+        hpa = getattr(self.game, "hpa", None)
+        if hpa is not None and hpa.is_long_range(start, goal_tile):
+            self.cancel_path_request()
+            plan = hpa.plan(start, goal_tile)
+            if plan is None:
+                self.path_plan = None
+                return []
+            self.path_plan = plan
+            return [start] + plan.next_segment()
+
+        queue = getattr(self.game, "path_queue", None)
+        if queue is not None:
+            request = queue.request(self, start, goal_tile)
+            if not request.done:
+                self.path_request = request
+                return None
+            self.path_request = None
+            path = request.path
+        else:
+            path = self.game.pathfinder.find_path(start, goal_tile)
+
+        self.path_plan = None
+        return path
+
     def compute_path_to(self, player_pos):
         tile_size = Config.TILE_SIZE
         start_tile = (
@@ -203,13 +285,13 @@ class Enemy(Entity):
             int(self.center[1] // Config.TILE_SIZE)
         )
 
-    def get_melee_dest_tile(self, player_tile, walkable_tiles):
+    def get_melee_dest_tile(self, player_tile):
         px, py = player_tile
         zone = [(px + dx, py + dy) for dx in range(-1, 2) for dy in range(-1, 2)]
         zone.remove(player_tile)
-        return self._pick_closest_tile(zone, walkable_tiles)
+        return self._pick_closest_tile(zone)
 
-    def get_ranged_dest_tile(self, player, player_tile, walkable_tiles, ring_radius=Config.RANGED_RING_RADIUS):
+    def get_ranged_dest_tile(self, player, player_tile, ring_radius=Config.RANGED_RING_RADIUS):
         px, py = player_tile
         zone = [
             (px + dx, py + dy)
@@ -218,43 +300,54 @@ class Enemy(Entity):
             if abs(dx) == ring_radius or abs(dy) == ring_radius
         ]
 
-        wall_rects = self.game.map.get_wall_rects()
         visible = []
         invisible = []
 
-        for tile in zone:
-            if tile not in walkable_tiles:
-                continue
-            tile_center = (
-                tile[0] * Config.TILE_SIZE + Config.TILE_SIZE // 2,
-                tile[1] * Config.TILE_SIZE + Config.TILE_SIZE // 2
-            )
-            if self.has_line_of_sight_from(tile_center, player.center, wall_rects):
+        candidates = self._reachable_tiles(zone)
+        visibility = getattr(self.game, "visibility", None)
+        if visibility is not None:
+            # Baked table: ring tile centre to the player's tile centre (the live test below uses player.center).
+            # Each lookup is a bit read, cheaper one at a time than as an array gather over a ring
+            sight = [visibility.tiles_visible(tile, player_tile) for tile in candidates]
+        else:
+            tile_centers = [
+                (tile[0] * Config.TILE_SIZE + Config.TILE_SIZE // 2,
+                 tile[1] * Config.TILE_SIZE + Config.TILE_SIZE // 2)
+                for tile in candidates
+            ]
+            sight = self.game.map.line_of_sight_many(tile_centers, player.center)
+        for tile, clear in zip(candidates, sight):
+            if clear:
                 visible.append(tile)
             else:
                 invisible.append(tile)
 
         if visible:
-            return self._pick_closest_tile(visible, walkable_tiles)
+            return self._pick_closest_tile(visible)
         elif invisible:
-            return self._pick_closest_tile(invisible, walkable_tiles)
+            return self._pick_closest_tile(invisible)
         else:
             return None
 
-    def _pick_closest_tile(self, candidates, walkable_tiles):
-        valid = [tile for tile in candidates if tile in walkable_tiles]
+    def _pick_closest_tile(self, candidates):
+        valid = self._reachable_tiles(candidates)
         if not valid:
             return None
         return min(valid, key=lambda t: self._tile_dist(self.get_current_tile(), t))
 
+    def _reachable_tiles(self, tiles):
+        # Walkable tiles in this enemy's connected region; goals sealed off from it can never be reached
+        game_map = self.game.map
+        region = game_map.region_of(*self.get_current_tile())
+        if region == 0:
+            return game_map.filter_walkable(tiles)  # embedded in a wall: let the pathfinder decide
+        return [tile for tile in tiles if game_map.region_of(*tile) == region]
+
     def _tile_dist(self, a, b):
         return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-    def has_line_of_sight_from(self, from_pos, to_pos, wall_rects):
-        for wall in wall_rects:
-            if wall.clipline(from_pos, to_pos):
-                return False
-        return True
+    def has_line_of_sight_from(self, from_pos, to_pos):
+        return self.game.map.has_line_of_sight(from_pos, to_pos)
 
     def draw(self, surface, camera, color=(200, 50, 200)):
         x, y = camera.apply(self.position)
@@ -281,7 +374,7 @@ class Enemy(Entity):
             rect = pg.Rect(screen_pos[0], screen_pos[1], tile_size, tile_size)
             pg.draw.rect(surface, color, rect, 2)  # thin outline box
 
-    def draw_debug_los(self, surface, camera, target_pos, wall_rects):
+    def draw_debug_los(self, surface, camera, target_pos):
         dx = target_pos[0] - self.center[0]
         dy = target_pos[1] - self.center[1]
         dist = math.hypot(dx, dy)
@@ -293,11 +386,7 @@ class Enemy(Entity):
         end = camera.apply(target_pos)
 
         # Check LOS
-        los_clear = True
-        for wall in wall_rects:
-            if wall.clipline(self.center, target_pos):
-                los_clear = False
-                break
+        los_clear = self.has_line_of_sight_from(self.center, target_pos)
 
         color = (0, 255, 0) if los_clear else (255, 0, 0)
         pg.draw.line(surface, color, start, end, 2)
@@ -2,18 +2,52 @@ import time
 import pygame as pg
 from config import Config
 from abyss_buff import Buff  # assuming Buff class is in buff.py
-from abyss_aoe_attack import AOEAttack
-from abyss_projectile import Projectile
+from abyss_aoe_attack import aoe_pool
+from abyss_projectile import projectile_pool
 from abyss_scroll import Scroll
+from entity_store import CodeColumn, Column
 
 class Entity:
+    # Fixed fields instead of a per-instance __dict__; subclasses list only what they add.
+    # Position, health, timers, cast state and team live in the EntityStore row (see below)
+    __slots__ = (
+        "store", "eid", "flat_damage", "center",
+        "projectile_scrolls", "aoe_scrolls", "buff_scrolls", "projectile_amp", "aoe_amp",
+        "buff_max_duration", "speed_buff", "damage_buff",
+        "pending_action", "pending_projectile", "pending_aoe", "buff_cast_time",
+        "base_radius", "aoe_multiplier", "aoe_cast_time", "target_pos",
+        "projectile_multiplier", "projectile_cast_time", "projectile_radius", "projectile_speed",
+        "health_color", "spatial_hash", "map",
+    )
+
+    team_id = CodeColumn("team")
+    state = CodeColumn("state")
+    health = Column("health")
+    max_health = Column("max_health")
+    attack = Column("attack")
+    defense = Column("defense")
+    size = Column("size")
+    speed = Column("speed")
+    cast_start_time = Column("cast_start_time")
+    cast_duration = Column("cast_duration")
+    invincible = Column("invincible")
+    invincible_start = Column("invincible_start")
+    invincible_duration = Column("invincible_duration")
+    aoe_last_used = Column("aoe_last_used")
+    aoe_cooldown = Column("aoe_cooldown")
+    projectile_last_used = Column("projectile_last_used")
+    projectile_cooldown = Column("projectile_cooldown")
+    buff_last_used = Column("buff_last_used")
+    buff_cooldown = Column("buff_cooldown")
 
     IDLE = "idle"
     MOVING = "moving"
     CASTING = "casting"
     DEAD = "dead"
 
-    def __init__(self, base_health, base_attack, base_defense, spawn_point, size):
+    def __init__(self, base_health, base_attack, base_defense, spawn_point, size, store):
+        self.store = store
+        self.eid = self.store.add(self)
         self.team_id = "entity"
 
         # Stats
@@ -30,21 +64,19 @@ class Entity:
             self.position[1] + self.size / 2
         )
 
-        self.scroll_counts = {
-            "projectile": 0,
-            "aoe": 0,
-            "buff": 0
-        }
+        # Scrolls picked up, by type
+        self.projectile_scrolls = 0
+        self.aoe_scrolls = 0
+        self.buff_scrolls = 0
 
         # Amplifiers
-        self.amplifiers = {
-            "projectile": 0,
-            "aoe": 0
-        }
+        self.projectile_amp = 0
+        self.aoe_amp = 0
         self.buff_max_duration = 5.0
 
-        # Buffs
-        self.active_buffs = {}
+        # Buffs, one Buff or None per type
+        self.speed_buff = None
+        self.damage_buff = None
 
         # State
         self.state = Entity.IDLE
@@ -52,6 +84,7 @@ class Entity:
         self.cast_duration = 0
         self.pending_action = None
         self.pending_projectile = None
+        self.pending_aoe = None
 
         # Buff
         self.buff_cast_time = 1.5
@@ -81,11 +114,28 @@ class Entity:
 
         self.health_color = (0, 255, 0)
 
+        # SpatialHash this entity is filed in, if any; kept current on every move
+        self.spatial_hash = None
+        # Map whose walls move() slides along; None moves freely
+        self.map = None
+
+    @property
+    def position(self):
+        columns, eid = self.store.columns, self.eid
+        return columns["x"].item(eid), columns["y"].item(eid)
+
+    @position.setter
+    def position(self, value):
+        columns, eid = self.store.columns, self.eid
+        columns["x"][eid], columns["y"][eid] = value
+
     def update_center(self):
-        self.center = (
-            self.position[0] + self.size / 2,
-            self.position[1] + self.size / 2
-        )
+        # Each position/size read goes to the store, so read them once
+        x, y = self.position
+        half = self.size / 2
+        self.center = (x + half, y + half)
+        if self.spatial_hash is not None:
+            self.spatial_hash.move(self)
 
     def move(self, direction):
         if self.state in (Entity.CASTING, Entity.DEAD):
@@ -97,31 +147,55 @@ class Entity:
             dx *= scale
             dy *= scale
 
-        speed_boost = self.active_buffs.get("speed", {}).get("value", 0)
+        speed_boost = self.buff_value("speed")
         total_speed = self.speed + speed_boost
-        self.position = (
-            self.position[0] + dx * total_speed,
-            self.position[1] + dy * total_speed
-        )
+        x, y = self.position
+        if self.map is not None:
+            # Same per-axis wall sliding as the player, without rounding the step
+            size = self.size
+            self.position = self.map.resolve_move(x, y, size, size, dx * total_speed, dy * total_speed)
+        else:
+            self.position = (x + dx * total_speed, y + dy * total_speed)
         self.update_center()
 
         if dx != 0 or dy != 0:
             self.state = Entity.MOVING
 
+    def steer(self, direction):
+        """Entity.move left to the store's movement pass, which steps every steered row at once."""
+        if self.state in (Entity.CASTING, Entity.DEAD):
+            return
+
+        dx, dy = direction
+        if dx != 0 and dy != 0:
+            scale = 1 / (2 ** 0.5)
+            dx *= scale
+            dy *= scale
+        self.store.steer(self.eid, dx, dy, self.buff_value("speed"))
+
+        if dx != 0 or dy != 0:
+            self.state = Entity.MOVING
+
     def take_damage(self, dmg, attacker):
         if self.invincible or self.state == Entity.DEAD:
             return
 
-        flat_damage = getattr(attacker, "flat_damage", 0)
-        buff_bonus = attacker.active_buffs.get("damage", {}).get("value", 0)
-        total_flat = flat_damage + buff_bonus + Config.FLAT_DMG
-
-        damage_taken = dmg * (dmg / (self.defense + dmg)) + total_flat
+        damage_taken = dmg * (dmg / (self.defense + dmg)) + attacker.flat_bonus()
         self.health -= damage_taken
+        self.on_damaged(dmg)
 
         self.invincible = True
         self.invincible_start = time.time()
+        self.after_hit()
+
+    def flat_bonus(self):
+        # Flat damage this entity adds on top of the mitigated hit
+        return self.flat_damage + self.buff_value("damage") + Config.FLAT_DMG
 
+    def on_damaged(self, dmg):
+        pass
+
+    def after_hit(self):
         if self.health <= 0:
             self.die()
         else:
@@ -130,18 +204,29 @@ class Entity:
             green = int(255*health_left)
             self.health_color = (red, green, 0)
 
-
-
     def die(self):
         self.state = Entity.DEAD
+        # A cast cut short never lands; its AOE still has to go back to the pool
+        if self.pending_aoe is not None:
+            self.pending_aoe.cancel()
+            self.pending_aoe = None
+        self.pending_action = None
         print(f"{self.__class__.__name__} has been defeated!")
 
     def apply_temporary_buff(self, buff_type, value, duration):
-        self.active_buffs[buff_type] = {
-            "value": value,
-            "start_time": time.time(),
-            "duration": duration
-        }
+        self.set_buff(Buff(self, buff_type, value, duration))
+
+    def set_buff(self, buff):
+        if buff.buff_type == "speed":
+            self.speed_buff = buff
+        elif buff.buff_type == "damage":
+            self.damage_buff = buff
+        else:
+            raise ValueError(f"Unknown buff type: {buff.buff_type}")
+
+    def buff_value(self, buff_type):
+        buff = self.speed_buff if buff_type == "speed" else self.damage_buff if buff_type == "damage" else None
+        return buff.value if buff else 0
 
     def use_buff(self):
         if self.state not in (Entity.IDLE, Entity.MOVING) or not self.can_use_buff():
@@ -159,7 +244,7 @@ class Entity:
             return None
 
         # Create AOE for drawing
-        aoe = AOEAttack(
+        aoe = aoe_pool.acquire(
             caster=self,
             generated_pos=gen_pos,
             base_radius=self.base_radius,
@@ -168,10 +253,12 @@ class Entity:
         )
 
         def apply_aoe_damage():
-            aoe.apply_to_targets(targets)
+            self.pending_aoe = None
+            aoe.apply_to_targets(targets, self.spatial_hash)
             self.aoe_last_used = time.time()
 
         self.start_cast(self.aoe_cast_time, on_complete=apply_aoe_damage)
+        self.pending_aoe = aoe
         return aoe
 
     def use_projectile(self, direction):
@@ -179,7 +266,7 @@ class Entity:
             return None
 
         def launch():
-            projectile = Projectile(
+            projectile = projectile_pool.acquire(
                 caster=self,
                 position=self.center,
                 direction=direction,
@@ -204,19 +291,21 @@ class Entity:
 
     def apply_scroll_buff(self, scroll_type, value):
         if scroll_type == "projectile":
-            self.amplifiers["projectile"] += value
+            self.projectile_amp += value
         elif scroll_type == "aoe":
-            self.amplifiers["aoe"] += value
+            self.aoe_amp += value
         elif scroll_type == "buff":
             self.buff_max_duration += value
 
     def obtain_scroll(self, scroll: Scroll):
         print(f"Obtaining scroll: {scroll.scroll_type}")
-        if not hasattr(self, "scroll_counts"):
-            self.scroll_counts = {"projectile": 0, "aoe": 0, "buff": 0}
-
         scroll_type = scroll.scroll_type
-        self.scroll_counts[scroll_type] += 1
+        if scroll_type == "projectile":
+            self.projectile_scrolls += 1
+        elif scroll_type == "aoe":
+            self.aoe_scrolls += 1
+        elif scroll_type == "buff":
+            self.buff_scrolls += 1
         scroll.apply(self)  # internally applies the buff
         print(f"Obtained: {scroll.get_description()}")
 
@@ -230,29 +319,34 @@ class Entity:
         current_time = time.time()
 
         # Buff expiration
-        expired = [b for b, v in self.active_buffs.items()
-                   if current_time - v["start_time"] >= v["duration"]]
-        for b in expired:
-            del self.active_buffs[b]
-
-        # Cast recovery
-        if self.state == Entity.CASTING and current_time - self.cast_start_time >= self.cast_duration:
+        if self.speed_buff and current_time - self.speed_buff.start_time >= self.speed_buff.duration:
+            self.speed_buff = None
+        if self.damage_buff and current_time - self.damage_buff.start_time >= self.damage_buff.duration:
+            self.damage_buff = None
+
+        # Cast recovery; state is read once, as every read goes to the store
+        state = self.state
+        if state == Entity.CASTING and current_time - self.cast_start_time >= self.cast_duration:
             self.state = Entity.IDLE
-            if self.pending_action:
-                self.pending_action()  # Call the function
-                self.pending_action = None
+            self.finish_cast()
+            state = self.state
 
-        if self.state not in (Entity.CASTING, Entity.MOVING, Entity.DEAD):
+        if state not in (Entity.CASTING, Entity.MOVING, Entity.DEAD, Entity.IDLE):
             self.state = Entity.IDLE
 
         # Invincibility
         if self.invincible and current_time - self.invincible_start >= self.invincible_duration:
             self.invincible = False
 
+    def finish_cast(self):
+        if self.pending_action:
+            self.pending_action()  # Call the function
+            self.pending_action = None
+
     def is_visible(self):
         if not self.invincible:
             return True
         return int((time.time() - self.invincible_start) * 10) % 2 == 0
 
     def get_rect(self):
-        return pg.Rect(self.position[0], self.position[1], self.size, self.size)
\ No newline at end of file
+        return pg.Rect(self.position[0], self.position[1], self.size, self.size)
@@ -50,6 +50,7 @@ def main():
 
         clock.tick(FPS)
 
+    gm.path_queue.shutdown()
     pg.quit()
 
 if __name__ == "__main__":
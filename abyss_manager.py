@@ -6,12 +6,17 @@ import pygame as pg
 from collections import Counter
 from config import Config  # assumes you’ve defined TILE_SIZE, SCREEN_WIDTH, MAP_LAYOUT
 from abyss_map import Map  # your Map class with chest/enemy/walkable logic
+from abyss_visibility import VisibilityTable
+from spatial_hash import SpatialHash
+from entity_store import EntityStore
 from abyss_camera import Camera  # basic camera that applies offsets
 from abyss_player import Player
-from abyss_aoe_attack import AOEAttack
-from abyss_projectile import Projectile
+from abyss_aoe_attack import AOEAttack, aoe_pool
+from abyss_projectile import Projectile, projectile_pool
+from projectile_system import ProjectileSystem
 from abyss_enemy import Enemy
-from pathfinder import AStarPathfinder
+from pathfinder import AStarPathfinder, FlowField, HierarchicalPathfinder, MovingTargetPlanner, PathRequestQueue
+from path_workers import PathWorkerPool
 from abyss_scroll import ScrollGenerator
 from abyss_chest import Chest
 from interaction_system import InteractionSystem
@@ -29,11 +34,17 @@ class GameManager:
 
         self.map = None
         self.camera = None
+        self.path_queue = None
+        self.visibility = None
+        self.entity_hash = None
+        self.enemy_index = None
+        self.entity_store = None
         self.enemies = []
-        self.player = Player(spawn_point=(self.tile_size * 74, self.tile_size * 55), map_ref=self.map, game_manager=self)
+        self.dead_enemies = []
+        self.player = None  # built by load_stage, in the stage's store
 
         self.active_aoes = []
-        self.projectiles = []
+        self.projectiles = ProjectileSystem(pool=projectile_pool)
 
         self.load_stage(self.stage_keys[self.current_stage_index])
 
@@ -59,8 +70,7 @@ class GameManager:
 
         # 2) Clear out lingering entities & effects
         self.enemies = []
-        self.projectiles = []
-        self.active_aoes = []
+        self.projectiles.clear()
         self.chests = []
 
         # 3) Reload the first stage (which also respawns player)
@@ -68,12 +78,24 @@ class GameManager:
         self.load_stage(first_key)
 
     def load_stage(self, stage_key):
+        # The previous stage's casters are dropped, so none of their casts will land
+        self.release_aoes(expired_only=False)
+        # Component rows for this stage's player, enemies and boss
+        self.entity_store = EntityStore()
+        map_path = Config.MAP_LAYOUT[stage_key]
+        self.map = Map(map_path, self.tile_size)
+        # One player per stage; it is the one filed in the hash that enemy attacks search
         self.player = Player(
             spawn_point=(self.tile_size * 74, self.tile_size * 55),
             map_ref=self.map,
             game_manager=self)
-        map_path = Config.MAP_LAYOUT[stage_key]
-        self.map = Map(map_path, self.tile_size)
+        self.entity_hash = SpatialHash()
+        self.track_entity(self.player)
+        # Enemies by position, so each frame visits only those near the player
+        self.enemy_index = SpatialHash(cell_size=Config.DETECTION_DISTANCE)
+        self.dead_enemies = []
+        # Baking takes seconds, so the game only picks up a table baked offline
+        self.visibility = VisibilityTable.load_baked(self.map) if Config.USE_VISIBILITY_TABLE else None
         chest_spawns = self.map.chest_spawns
 
         # Generate scrolls
@@ -81,9 +103,9 @@ class GameManager:
 
         def get_player_scroll_count():
             return Counter({
-                "projectile": self.player.scroll_counts["projectile"],
-                "aoe": self.player.scroll_counts["aoe"],
-                "buff": self.player.scroll_counts["buff"]
+                "projectile": self.player.projectile_scrolls,
+                "aoe": self.player.aoe_scrolls,
+                "buff": self.player.buff_scrolls
             })
 
         scrolls = scroll_generator.generate_all_scrolls(get_player_scroll_count)
@@ -103,7 +125,27 @@ class GameManager:
         self.boss = None
         self.boss_spawn_point = (320, 288)  # define special tile or use last enemy tile
 
-        self.pathfinder = AStarPathfinder(self.map.grid)
+        self.pathfinder = AStarPathfinder(self.map)
+        if self.path_queue:
+            self.path_queue.shutdown()
+        self.path_queue = None
+        if Config.PATH_WORKERS > 0:
+            try:
+                self.path_queue = PathWorkerPool(self.pathfinder)
+            except (OSError, NotImplementedError) as e:
+                print(f"Path workers unavailable, searching on the main thread: {e}")
+        # Search trees live in this process, so worker searches start from scratch each time
+        self.replanner = None
+        if self.path_queue is None:
+            if Config.USE_INCREMENTAL_REPLANNING:
+                self.replanner = MovingTargetPlanner(self.pathfinder)
+            self.path_queue = PathRequestQueue(self.pathfinder, replanner=self.replanner)
+        self.hpa = None
+        if Config.USE_HIERARCHICAL_PATHFINDING:
+            self.hpa = HierarchicalPathfinder(self.pathfinder)
+        self.flow_field = None
+        if Config.PATHFINDING_MODE == "flow_field":
+            self.flow_field = FlowField(self.pathfinder, max_cost=Config.FLOW_FIELD_MAX_COST)
         for spawn_cell in self.map.enemy_spawns:
             world_x = spawn_cell[0] * Config.TILE_SIZE
             world_y = spawn_cell[1] * Config.TILE_SIZE
@@ -118,10 +160,9 @@ class GameManager:
             level = self.current_stage_index
             enemy.apply_scroll_buff(scroll_type, value=level * 5)
 
-            self.enemies.append(enemy)
+            self.add_enemy(enemy)
 
         self.camera = Camera(Config.GAME_SCREEN, Config.GAME_SCREEN)
-        self.player = Player(spawn_point=(self.tile_size * 74, self.tile_size * 55), map_ref=self.map, game_manager=self)  # reset position
 
     def handle_win(self):
         self.game_over = True
@@ -143,9 +184,39 @@ class GameManager:
     def spawn_boss(self):
         self.boss_spawned = True
         self.boss = Boss(spawn_point=self.boss_spawn_point, size=Config.TILE_SIZE, game_manager=self, stage_level=self.current_stage_index)
-        self.enemies.append(self.boss)
+        self.add_enemy(self.boss)
         print("Boss has spawned!")
 
+    def add_enemy(self, enemy):
+        self.enemies.append(enemy)
+        self.track_entity(enemy)
+        self.enemy_index.insert(enemy)
+
+    def on_enemy_died(self, enemy):
+        self.dead_enemies.append(enemy)
+
+    def release_aoes(self, expired_only=True):
+        # Compact in place; retired AOEs return to the pool once their cast has dealt its damage,
+        # or straight away when every AOE goes (nothing is left to finish the cast)
+        kept = 0
+        for aoe in self.active_aoes:
+            if expired_only and not aoe.is_expired():
+                self.active_aoes[kept] = aoe
+                kept += 1
+            else:
+                if not expired_only:
+                    aoe.cancel()
+                aoe.retire()
+        del self.active_aoes[kept:]
+
+    def pool_stats(self):
+        return {"projectile": projectile_pool.stats(), "aoe": aoe_pool.stats()}
+
+    def track_entity(self, entity):
+        # Projectile and AOE hits look targets up through the hash
+        self.entity_hash.insert(entity)
+        entity.spatial_hash = self.entity_hash
+
     def update(self):
         result = self.player.update(self.enemies, self.camera)
         if isinstance(result, AOEAttack):
@@ -153,25 +224,50 @@ class GameManager:
         elif isinstance(result, Projectile):
             self.projectiles.append(result)
         self.camera.update(self.player.center)
+        if self.flow_field:
+            self.flow_field.set_origin((
+                int(self.player.center[0] // Config.TILE_SIZE),
+                int(self.player.center[1] // Config.TILE_SIZE)
+            ))
 
         self.interaction_system.update(self.player)
 
-        dead_enemies = []
-        for enemy in self.enemies:
+        # Only buckets around the player are visited; sleeping enemies further out cost nothing
+        px, py = self.player.center
+        reach = Config.DETECTION_DISTANCE
+        awake = []
+        for enemy in self.enemy_index.candidates(px - reach, py - reach, px + reach, py + reach):
             if enemy.state == "dead":
-                dead_enemies.append(enemy)
                 continue
 
-            dx = enemy.center[0] - self.player.center[0]
-            dy = enemy.center[1] - self.player.center[1]
+            dx = enemy.center[0] - px
+            dy = enemy.center[1] - py
             dist = (dx ** 2 + dy ** 2) ** 0.5
 
             if dist <= Config.DETECTION_DISTANCE:
-                result = enemy.update(self.player)
-                if isinstance(result, AOEAttack):
-                    self.active_aoes.append(result)
-                elif isinstance(result, Projectile):
-                    self.projectiles.append(result)
+                awake.append(enemy)
+
+        # Cast and invincibility timers of every awake enemy in one column pass;
+        # enemy.update() then finds them already settled
+        store = self.entity_store
+        for eid in store.tick(store.ids(awake), time.time()).tolist():
+            store.owners[eid].finish_cast()
+
+        for enemy in awake:
+            result = enemy.update(self.player)
+            if isinstance(result, AOEAttack):
+                self.active_aoes.append(result)
+            elif isinstance(result, Projectile):
+                self.projectiles.append(result)
+
+        # Enemies walking their paths only steered; one column pass moves them all
+        for eid in store.move(self.map).tolist():
+            store.owners[eid].update_center()
+        for enemy in awake:
+            self.enemy_index.move(enemy)
+
+        # Budgeted searches resume here, or finished worker results are collected
+        self.path_queue.run()
 
         keys = pg.key.get_pressed()
         if keys[pg.K_j]:
@@ -192,24 +288,25 @@ class GameManager:
             self.handle_lose()
             return
 
-        for p in self.projectiles:
-            if p.caster.team_id == "player":
-                p.update(self.map.get_wall_rects(), self.enemies)
-            elif p.caster.team_id == "enemy":
-                p.update(self.map.get_wall_rects(), [self.player])
-
-        self.projectiles = [p for p in self.projectiles if p.active]
+        # One batched pass over the entities near the shots; team codes keep each side's shots off its own
+        self.projectiles.update(self.map, spatial_hash=self.entity_hash)
 
         for aoe in self.active_aoes:
-            # Optional: expire based on lifetime or duration
             aoe.update()
-            if hasattr(aoe, "start_time") and time.time() - aoe.start_time > aoe.lifetime:
-                self.active_aoes.remove(aoe)
-
-        self.active_aoes = [aoe for aoe in self.active_aoes if not aoe.is_expired()]
-
-        for e in dead_enemies:
+        self.release_aoes()
+
+        # Deaths are reported by Enemy.die, so no frame scans the whole list for them
+        for e in self.dead_enemies:
+            if e not in self.enemy_index:
+                continue  # killed twice before being cleared
+            self.path_queue.cancel(e)
+            if self.replanner:
+                self.replanner.forget(e)
+            self.entity_hash.remove(e)
+            self.enemy_index.remove(e)
+            e.spatial_hash = None
             self.enemies.remove(e)
+        self.dead_enemies = []
 
     def draw(self):
         self.map.draw_placeholder(self.screen, self.camera, floor=True, chest=True, enemy=True)
@@ -220,7 +317,7 @@ class GameManager:
         for enemy in self.enemies:
             # enemy.draw_debug_path(self.screen, self.camera)
             enemy.draw(self.screen, self.camera)
-            # enemy.draw_debug_los(self.screen, self.camera, self.player.center, self.map.get_wall_rects())
+            # enemy.draw_debug_los(self.screen, self.camera, self.player.center)
 
         if self.boss_spawned:
             self.boss.draw(self.screen, self.camera)
@@ -250,12 +347,12 @@ class GameManager:
         pg.font.init()
         font = pg.font.SysFont("arial", 30)
         state_text = f"State: {self.player.state}"
-        stat_text = (f"Speed buff: {self.player.active_buffs.get("speed", {}).get("value", 0)} "
-                     f"Dmg buff: {self.player.active_buffs.get("damage", {}).get("value", 0)}")
+        stat_text = (f"Speed buff: {self.player.buff_value('speed')} "
+                     f"Dmg buff: {self.player.buff_value('damage')}")
 
 
-        proj = f"Projectile damage +{self.player.amplifiers["projectile"]}%"
-        aoe =  f"AOE radius +{self.player.amplifiers["aoe"]}"
+        proj = f"Projectile damage +{self.player.projectile_amp}%"
+        aoe =  f"AOE radius +{self.player.aoe_amp}"
         buff = f"Buff duration {self.player.buff_max_duration} second"
 
 
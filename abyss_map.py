@@ -1,6 +1,10 @@
+import hashlib
+import os
+import numpy as np
 import pygame as pg
 from PIL import Image
 from config import Config
+from abyss_utils import circle_rect_collision, grid_cells_near_segment, sweep_box_rect
 
 class Map:
 
@@ -9,90 +13,446 @@ class Map:
     ENEMY_SPAWN = 'E'
     CHEST_SPAWN = 'C'
 
-    def __init__(self, image_path, tile_size):
+    # Layout colours packed as 0xRRGGBB; anything else is treated as wall
+    TILE_COLORS = {
+        0x000000: WALL,         # black = wall
+        0xFFFFFF: FLOOR,        # white = floor
+        0xFF0000: ENEMY_SPAWN,  # red = enemy zone
+        0x00FF00: CHEST_SPAWN,  # green = chest zone
+    }
+    TILE_DRAW_COLORS = {
+        WALL: (50, 50, 50),
+        ENEMY_SPAWN: (230, 230, 230),
+        CHEST_SPAWN: (200, 200, 0),
+        FLOOR: (230, 230, 230),
+    }
+    CHUNK_TILES = 16  # baked map surfaces are CHUNK_TILES x CHUNK_TILES tiles
+    SIGHT_STEP = 8  # line_of_sight_many samples rays this many pixels apart
+    SIGHT_BATCH_MIN = 8  # below this many rays the array pass costs more than it saves
+    SIGHT_CLEAR, SIGHT_NEAR, SIGHT_BLOCKED = range(3)
+    CACHE_VERSION = 1
+    _compiled = {}  # in-process cache: key -> uint8 code grid
+
+    def __init__(self, image_path, tile_size, merge_walls=Config.MERGE_WALL_COLLIDERS):
         self.tile_size = tile_size
-        self.grid = self._load_grid_from_image(image_path)
+        self.merge_walls = merge_walls
+        # codes[y, x] holds the ASCII byte of the tile char, so grid rows stay plain strings
+        self.codes = self._load_codes(image_path)
+        self.grid = [row.tobytes().decode("ascii") for row in self.codes]
+        self.rows, self.cols = self.codes.shape
+        self.walkable_bits = bytearray()  # 1 bit per tile, index y * cols + x
         self.walkable = []
+        self.regions = None  # connected walkable regions, labelled from 1 (0 = wall)
+        self.region_count = 0
         self.chest_spawns = []
         self.enemy_spawns = []
         self._process_layout()
 
+        # Wall colliders are built once per map; queries only look at nearby cells
+        self.wall_colliders = ()
+        self._collider_grid = []
+        self._build_wall_index()
+
+        # Baked draw layers: (layer, chunk_x, chunk_y) -> Surface
+        self._chunk_cache = {}
+
+        # Called as listener(x, y) after set_tile changes a tile
+        self.change_listeners = []
+
+    def _load_codes(self, image_path):
+        with open(image_path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()[:16]
+        key = f"{os.path.splitext(os.path.basename(image_path))[0]}_{digest}_{self.tile_size}_v{Map.CACHE_VERSION}"
+
+        if key in Map._compiled:
+            return Map._compiled[key]
+
+        cache_path = os.path.join(Config.MAP_CACHE_DIR, key + ".npy")
+        codes = None
+        if os.path.exists(cache_path):
+            try:
+                codes = np.load(cache_path, allow_pickle=False)
+            except (OSError, ValueError):
+                codes = None  # unreadable cache, decode again
+
+        if codes is None or codes.dtype != np.uint8 or codes.ndim != 2:
+            codes = self._load_grid_from_image(image_path)
+            try:
+                os.makedirs(Config.MAP_CACHE_DIR, exist_ok=True)
+                np.save(cache_path, codes, allow_pickle=False)
+            except OSError as e:
+                print(f"Could not write map cache: {e}")
+
+        codes.setflags(write=False)
+        Map._compiled[key] = codes
+        return codes
+
     def _load_grid_from_image(self, image_path):
-        img = Image.open(image_path).convert("RGB")
-        width, height = img.size
-        grid = []
-
-        for y in range(height // self.tile_size):
-            row = []
-            for x in range(width // self.tile_size):
-                px = x * self.tile_size + self.tile_size // 2
-                py = y * self.tile_size + self.tile_size // 2
-                r, g, b = img.getpixel((px, py))
-
-                if (r, g, b) == (0, 0, 0):  # black = wall
-                    row.append(Map.WALL)
-                elif (r, g, b) == (255, 255, 255):  # white = floor
-                    row.append(Map.FLOOR)
-                elif (r, g, b) == (255, 0, 0):  # red = enemy zone
-                    row.append(Map.ENEMY_SPAWN)
-                elif (r, g, b) == (0, 255, 0):  # green = chest zone
-                    row.append(Map.CHEST_SPAWN)
-                else:
-                    row.append(Map.WALL)  # default to walkable
-            grid.append(row)
-        return grid
+        img = np.asarray(Image.open(image_path).convert("RGB"))
+        height, width = img.shape[:2]
+        rows, cols = height // self.tile_size, width // self.tile_size
+        half = self.tile_size // 2
+
+        # Sample the centre pixel of every tile in one slice
+        px = img[half:rows * self.tile_size:self.tile_size,
+                 half:cols * self.tile_size:self.tile_size].astype(np.uint32)
+        packed = (px[..., 0] << 16) | (px[..., 1] << 8) | px[..., 2]
+
+        codes = np.full((rows, cols), ord(Map.WALL), dtype=np.uint8)  # default to wall
+        for color, tile in Map.TILE_COLORS.items():
+            codes[packed == color] = ord(tile)
+        return codes
 
     def _process_layout(self):
-        for y, row in enumerate(self.grid):
-            for x, cell in enumerate(row):
-                if cell != Map.WALL:  # walkable if not a wall
-                    self.walkable.append((x, y))
-                if cell == Map.CHEST_SPAWN:
-                    self.chest_spawns.append((x, y))
-                if cell == Map.ENEMY_SPAWN:
-                    self.enemy_spawns.append((x, y))
+        # argwhere walks row-major, matching the old nested-loop order
+        def cells(mask):
+            return [(int(x), int(y)) for y, x in np.argwhere(mask)]
+
+        walkable_mask = self.codes != ord(Map.WALL)
+        self.walkable_bits = bytearray(np.packbits(walkable_mask, axis=None, bitorder="little").tobytes())
+        self._sight = None  # rebuilt by _sight_raster on the next batched LOS query
+        self.walkable = cells(walkable_mask)
+        self.regions, self.region_count = self._label_regions(walkable_mask)
+        self._region_ids = self.regions.ravel().tolist()
+        self.chest_spawns = cells(self.codes == ord(Map.CHEST_SPAWN))
+        self.enemy_spawns = cells(self.codes == ord(Map.ENEMY_SPAWN))
+
+    def _label_regions(self, walkable_mask):
+        # 4-connected flood fill; the pathfinder's corner rule means diagonals never join regions
+        rows, cols = walkable_mask.shape
+        open_cells = walkable_mask.ravel().tolist()
+        labels = [0] * (rows * cols)
+        count = 0
+        for seed in np.flatnonzero(walkable_mask).tolist():
+            if labels[seed]:
+                continue
+            count += 1
+            labels[seed] = count
+            stack = [seed]
+            while stack:
+                i = stack.pop()
+                x = i % cols
+                for j in (i - cols, i + cols, i - 1 if x > 0 else -1, i + 1 if x < cols - 1 else -1):
+                    if 0 <= j < rows * cols and open_cells[j] and not labels[j]:
+                        labels[j] = count
+                        stack.append(j)
+        return np.array(labels, dtype=np.int32).reshape(rows, cols), count
+
+    def _build_wall_index(self):
+        rows, cols = len(self.grid), len(self.grid[0])
+        collider_grid = [[() for _ in range(cols)] for _ in range(rows)]
+        colliders = []
+
+        if self.merge_walls:
+            spans = self._merge_wall_spans()
+        else:
+            spans = [(x, y, 1, 1) for y, row in enumerate(self.grid)
+                     for x, cell in enumerate(row) if cell == Map.WALL]
+
+        for x, y, w, h in spans:
+            wall = pg.Rect(
+                x * self.tile_size,
+                y * self.tile_size,
+                w * self.tile_size,
+                h * self.tile_size
+            )
+            colliders.append(wall)
+            for ty in range(y, y + h):
+                for tx in range(x, x + w):
+                    collider_grid[ty][tx] = (wall,)
+
+        self._collider_grid = tuple(tuple(row) for row in collider_grid)
+        self.wall_colliders = tuple(colliders)
+
+    def _merge_wall_spans(self):
+        # Greedy meshing: grow each unclaimed wall right, then down while the whole span is wall
+        rows, cols = len(self.grid), len(self.grid[0])
+        claimed = [[False] * cols for _ in range(rows)]
+        spans = []
+
+        def free_wall(x, y):
+            return self.grid[y][x] == Map.WALL and not claimed[y][x]
+
+        for y in range(rows):
+            for x in range(cols):
+                if not free_wall(x, y):
+                    continue
+
+                w = 1
+                while x + w < cols and free_wall(x + w, y):
+                    w += 1
+
+                h = 1
+                while y + h < rows and all(free_wall(tx, y + h) for tx in range(x, x + w)):
+                    h += 1
+
+                for ty in range(y, y + h):
+                    for tx in range(x, x + w):
+                        claimed[ty][tx] = True
+                spans.append((x, y, w, h))
+        return spans
 
     def get_wall_rects(self):
-        wall_rects = []
-        for y, row in enumerate(self.grid):
-            for x, cell in enumerate(row):
-                if cell == Map.WALL:
-                    wall_rects.append(pg.Rect(
-                        x * self.tile_size,
-                        y * self.tile_size,
-                        self.tile_size,
-                        self.tile_size
-                    ))
-        return wall_rects
+        return list(self.wall_colliders)
+
+    def _walls_in_box(self, left, top, right, bottom):
+        # Over-fetch by one pixel so walls touching the box edge are included
+        rows = len(self._collider_grid)
+        cols = len(self._collider_grid[0]) if rows else 0
+        x0 = max(0, int((left - 1) // self.tile_size))
+        y0 = max(0, int((top - 1) // self.tile_size))
+        x1 = min(cols - 1, int(right // self.tile_size))
+        y1 = min(rows - 1, int(bottom // self.tile_size))
+
+        walls = []
+        seen = set()
+        for y in range(y0, y1 + 1):
+            row = self._collider_grid[y]
+            for x in range(x0, x1 + 1):
+                for wall in row[x]:
+                    if id(wall) not in seen:
+                        seen.add(id(wall))
+                        walls.append(wall)
+        return walls
+
+    def query_walls_rect(self, rect):
+        rect = pg.Rect(rect)
+        return [wall for wall in self._walls_in_box(rect.left, rect.top, rect.right, rect.bottom)
+                if rect.colliderect(wall)]
+
+    def _wall_tiles_in_box(self, left, top, right, bottom):
+        # Wall tiles as (left, top, right, bottom), one pixel over-fetched and in row-major
+        # order, exactly as the per-tile collider index would list them
+        ts = self.tile_size
+        x0 = max(0, int((left - 1) // ts))
+        y0 = max(0, int((top - 1) // ts))
+        x1 = min(self.cols - 1, int(right // ts))
+        y1 = min(self.rows - 1, int(bottom // ts))
+        for y in range(y0, y1 + 1):
+            row = self.grid[y]
+            for x in range(x0, x1 + 1):
+                if row[x] == Map.WALL:
+                    yield x * ts, y * ts, (x + 1) * ts, (y + 1) * ts
+
+    def resolve_move(self, x, y, width, height, dx, dy):
+        """Move a box by dx then dy, pushing it out of walls it enters on each axis (slides along them).
+
+        Only wall tiles in the cells the box crosses are looked at. Integer input behaves exactly like
+        the pg.Rect version it replaced; floats work the same way without rounding. Walls are taken
+        tile by tile whatever merge_walls says: pushing out of a merged rect would move a box that
+        already overlaps a wall to a different edge.
+        """
+        if dx:
+            moved_x = x + dx
+            left, right = min(x, moved_x), max(x, moved_x) + width
+            for wall_left, wall_top, wall_right, wall_bottom in self._wall_tiles_in_box(left, y, right, y + height):
+                if not (left < wall_right and wall_left < right and y < wall_bottom and wall_top < y + height):
+                    continue  # outside the swept box, as query_walls_rect would have filtered it
+                if moved_x < wall_right and wall_left < moved_x + width and y < wall_bottom and wall_top < y + height:
+                    moved_x = wall_left - width if dx > 0 else wall_right
+            x = moved_x
+
+        if dy:
+            moved_y = y + dy
+            top, bottom = min(y, moved_y), max(y, moved_y) + height
+            for wall_left, wall_top, wall_right, wall_bottom in self._wall_tiles_in_box(x, top, x + width, bottom):
+                if not (x < wall_right and wall_left < x + width and top < wall_bottom and wall_top < bottom):
+                    continue
+                if x < wall_right and wall_left < x + width and moved_y < wall_bottom and wall_top < moved_y + height:
+                    moved_y = wall_top - height if dy > 0 else wall_bottom
+            y = moved_y
+
+        return x, y
+
+    def query_walls_segment(self, start, end):
+        walls = []
+        for wall in self._segment_walls(start, end):
+            if wall not in walls:
+                walls.append(wall)
+        return walls
+
+    def has_line_of_sight(self, start, end):
+        return next(self._segment_walls(start, end), None) is None
+
+    def line_of_sight_many(self, starts, end):
+        """has_line_of_sight from each of starts to one end, as a list of bools.
+
+        has_line_of_sight only looks at walls within two pixels of the segment. One array pass
+        samples every ray at once and reads each sample's cell of the sight raster: rays with
+        no wall that close are clear, and rays with a sample well inside a wall are blocked.
+        Only rays that graze a wall go through the per-ray test.
+        """
+        if len(starts) < Map.SIGHT_BATCH_MIN:
+            return [self.has_line_of_sight(start, end) for start in starts]
+        step = Map.SIGHT_STEP
+        raster = self._sight_raster()
+        # Truncated like _segment_walls, so the sampled segment is the one clipline sees
+        sx, sy = np.trunc(np.array(starts, dtype=np.float64)).T
+        ex, ey = int(end[0]), int(end[1])
+        samples = int(np.hypot(ex - sx, ey - sy).max() // step) + 2
+        t = np.arange(samples) / (samples - 1)
+        # Raster cells are offset by one for its border ring; off-map samples land on the ring
+        cx = ((sx[:, None] + (ex - sx[:, None]) * t) // step).astype(np.int64)
+        cy = ((sy[:, None] + (ey - sy[:, None]) * t) // step).astype(np.int64)
+        cx = np.minimum(np.maximum(cx, -1, out=cx), raster.shape[1] - 2, out=cx)
+        cy = np.minimum(np.maximum(cy, -1, out=cy), raster.shape[0] - 2, out=cy)
+        cells = raster[cy + 1, cx + 1]
+        blocked = (cells == Map.SIGHT_BLOCKED).any(axis=1)
+        graze = (cells == Map.SIGHT_NEAR).any(axis=1) & ~blocked
+
+        clear = (~blocked).tolist()
+        for i in np.flatnonzero(graze).tolist():
+            clear[i] = self.has_line_of_sight(starts[i], end)
+        return clear
+
+    def _sight_raster(self):
+        # SIGHT_STEP-pixel cells, plus a ring for everything off the map: SIGHT_NEAR where a wall tile
+        # is within 2 + SIGHT_STEP / 2 pixels of the cell (any segment point is that close to a
+        # sample), SIGHT_BLOCKED where the cell lies two pixels or more inside a wall tile
+        if self._sight is not None:
+            return self._sight
+        ts, step = self.tile_size, Map.SIGHT_STEP
+        reach = 2 + step / 2
+        walls = np.zeros((self.rows + 2, self.cols + 2), dtype=bool)  # off-map tiles are not walls
+        walls[1:-1, 1:-1] = self.codes == ord(Map.WALL)
+
+        def tile_span(cells, tiles):
+            # Per cell along one axis (tiles offset by one, like the cells): the first and last tile
+            # the cell grown by reach meets, which is all of them as it is under a tile wide; the
+            # tile holding the cell; and whether the cell keeps two pixels clear of that tile's edges
+            left = np.arange(-1, cells - 1, dtype=np.float64) * step
+            first, last, own = ((edge // ts + 1).astype(np.int64).clip(0, tiles + 1)
+                                for edge in (left - reach, left + step + reach, left))
+            inner = (left % ts >= 2) & (left % ts + step <= ts - 2)
+            return first, last, own, inner
+
+        x0, x1, xt, x_inner = tile_span(-(-self.cols * ts // step) + 2, self.cols)
+        y0, y1, yt, y_inner = tile_span(-(-self.rows * ts // step) + 2, self.rows)
+
+        near = (walls[np.ix_(y0, x0)] | walls[np.ix_(y0, x1)] | walls[np.ix_(y1, x0)] | walls[np.ix_(y1, x1)])
+        inside = walls[np.ix_(yt, xt)] & y_inner[:, None] & x_inner[None, :]
+        self._sight = np.where(inside, Map.SIGHT_BLOCKED, np.where(near, Map.SIGHT_NEAR, Map.SIGHT_CLEAR)).astype(np.int8)
+        return self._sight
+
+    def _segment_walls(self, start, end):
+        # clipline truncates float endpoints, so the ray must as well
+        start = (int(start[0]), int(start[1]))
+        end = (int(end[0]), int(end[1]))
+
+        # clipline rounds its clipped points, so it can report a hit up to a pixel or two
+        # off the true line: also walk the cells within two pixels of the segment
+        for x, y in grid_cells_near_segment(start, end, 2, self.tile_size):
+            if 0 <= x < self.cols and 0 <= y < self.rows:
+                for wall in self._collider_grid[y][x]:
+                    if wall.clipline(start, end):
+                        yield wall
+
+    def sweep_box(self, start, end, half_size):
+        """First wall hit by a square of half_size moving start -> end, as (t in [0, 1), wall), or None."""
+        best = None
+        for x, y in grid_cells_near_segment(start, end, half_size + 1, self.tile_size):
+            if 0 <= x < self.cols and 0 <= y < self.rows:
+                for wall in self._collider_grid[y][x]:
+                    t = sweep_box_rect(start, end, half_size, wall)
+                    if t is not None and (best is None or t < best[0]):
+                        best = (t, wall)
+        return best
+
+    def query_walls_circle(self, center, radius):
+        cx, cy = center
+        return [wall for wall in self._walls_in_box(cx - radius, cy - radius, cx + radius, cy + radius)
+                if circle_rect_collision(center, radius, wall)]
+
+    def set_tile(self, x, y, tile):
+        if self.grid[y][x] == tile:
+            return
+        if not self.codes.flags.writeable:
+            self.codes = self.codes.copy()  # the compiled grid is shared, so copy before editing
+        self.codes[y, x] = ord(tile)
+        row = self.grid[y]
+        self.grid[y] = row[:x] + tile + row[x + 1:]
+
+        self._process_layout()
+        self._build_wall_index()
+        self.invalidate_chunks([(x, y)])
+        for listener in self.change_listeners:
+            listener(x, y)
+
+    def invalidate_chunks(self, tiles=None):
+        if tiles is None:
+            self._chunk_cache.clear()
+            return
+        dirty = {(x // Map.CHUNK_TILES, y // Map.CHUNK_TILES) for x, y in tiles}
+        for key in [k for k in self._chunk_cache if (k[1], k[2]) in dirty]:
+            del self._chunk_cache[key]
 
     def is_walkable(self, x, y):
-        if 0 <= y < len(self.grid) and 0 <= x < len(self.grid[0]):
-            return self.grid[y][x] != '1'
+        if 0 <= y < self.rows and 0 <= x < self.cols:
+            i = y * self.cols + x
+            return (self.walkable_bits[i >> 3] >> (i & 7)) & 1 == 1
         return False
 
+    def region_of(self, x, y):
+        """Connected region label of a walkable tile; 0 for walls and off-map tiles."""
+        if 0 <= y < self.rows and 0 <= x < self.cols:
+            return self._region_ids[y * self.cols + x]
+        return 0
+
+    def same_region(self, a, b):
+        region = self.region_of(*a)
+        return region != 0 and region == self.region_of(*b)
+
+    def filter_walkable(self, tiles):
+        return [tile for tile in tiles if self.is_walkable(*tile)]
+
     def get_walkable_tiles(self):
-        walkable = []
-        for y, row in enumerate(self.grid):
-            for x, cell in enumerate(row):
-                if self.is_walkable(x, y):
-                    walkable.append((x, y))
-        return walkable
+        return list(self.walkable)
+
+    def _bake_chunk(self, layer, chunk_x, chunk_y):
+        colors = {tile: color for tile, color in Map.TILE_DRAW_COLORS.items() if tile in layer}
+        x0, y0 = chunk_x * Map.CHUNK_TILES, chunk_y * Map.CHUNK_TILES
+        x1 = min(x0 + Map.CHUNK_TILES, len(self.grid[0]))
+        y1 = min(y0 + Map.CHUNK_TILES, len(self.grid))
+
+        # Black is not a tile colour, so it doubles as the transparent key
+        chunk = pg.Surface(((x1 - x0) * self.tile_size, (y1 - y0) * self.tile_size))
+        if pg.display.get_surface() is not None:
+            chunk = chunk.convert()
+        chunk.fill((0, 0, 0))
+        chunk.set_colorkey((0, 0, 0), pg.RLEACCEL)
+
+        for y in range(y0, y1):
+            row = self.grid[y]
+            for x in range(x0, x1):
+                color = colors.get(row[x])
+                if color:
+                    rect = pg.Rect((x - x0) * self.tile_size, (y - y0) * self.tile_size,
+                                   self.tile_size, self.tile_size)
+                    pg.draw.rect(chunk, color, rect)
+        return chunk
 
     def draw_placeholder(self, surface, camera, show_grid=True, wall=False, floor=False, enemy=False, chest=False):
-        for y, row in enumerate(self.grid):
-            for x, cell in enumerate(row):
-                world_x = x * self.tile_size
-                world_y = y * self.tile_size
-                screen_x, screen_y = camera.apply((world_x, world_y))
-
-                if show_grid:
-                    rect = pg.Rect(screen_x, screen_y, self.tile_size, self.tile_size)
-
-                    if cell == Map.WALL and wall == True:
-                        pg.draw.rect(surface, (50, 50, 50), rect)      # Wall
-                    elif cell == Map.ENEMY_SPAWN and enemy == True:
-                        pg.draw.rect(surface, (230, 230, 230), rect)      # Enemy spawn
-                    elif cell == Map.CHEST_SPAWN and chest == True:
-                        pg.draw.rect(surface, (200, 200, 0), rect)      # Chest
-                    elif cell == Map.FLOOR and floor == True:
-                        pg.draw.rect(surface, (230, 230, 230), rect)  # Floor
\ No newline at end of file
+        if not show_grid:
+            return
+
+        layer = frozenset(tile for tile, on in ((Map.WALL, wall), (Map.FLOOR, floor),
+                                                (Map.ENEMY_SPAWN, enemy), (Map.CHEST_SPAWN, chest))
+                          if on == True)
+        if not layer:
+            return
+
+        # Only blit the chunks that overlap the part of the world on screen
+        chunk_px = Map.CHUNK_TILES * self.tile_size
+        left, top = int(camera.offset.x), int(camera.offset.y)
+        width, height = surface.get_size()
+        cols = (len(self.grid[0]) + Map.CHUNK_TILES - 1) // Map.CHUNK_TILES
+        rows = (len(self.grid) + Map.CHUNK_TILES - 1) // Map.CHUNK_TILES
+
+        for chunk_y in range(max(0, top // chunk_px), min(rows, (top + height) // chunk_px + 1)):
+            for chunk_x in range(max(0, left // chunk_px), min(cols, (left + width) // chunk_px + 1)):
+                key = (layer, chunk_x, chunk_y)
+                chunk = self._chunk_cache.get(key)
+                if chunk is None:
+                    chunk = self._bake_chunk(layer, chunk_x, chunk_y)
+                    self._chunk_cache[key] = chunk
+                surface.blit(chunk, camera.apply((chunk_x * chunk_px, chunk_y * chunk_px)))
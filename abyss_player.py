@@ -1,17 +1,20 @@
 import pygame as pg
-import time
 from abyss_entity import Entity
-from config import Config
+from entity_store import EntityStore
 from datalogger import DataLogger
 
 class Player(Entity):
+    __slots__ = ("camera", "game_manager")
+
     def __init__(self, spawn_point, map_ref, game_manager=None):
         super().__init__(
             base_health=100,
             base_attack=20,
             base_defense=10,
             spawn_point=spawn_point,
-            size=40
+            size=40,
+            # The stage's store; a player made on its own gets a store of its own
+            store=game_manager.entity_store if game_manager else EntityStore()
         )
         self.speed = 4.0
         self.team_id = "player"
@@ -23,33 +26,12 @@ class Player(Entity):
 
         self.game_manager = game_manager
 
-    def take_damage(self, dmg, attacker):
-        if self.invincible or self.state == Entity.DEAD:
-            return
-
-        flat_damage = getattr(attacker, "flat_damage", 0)
-        buff_bonus = attacker.active_buffs.get("damage", {}).get("value", 0)
-        total_flat = flat_damage + buff_bonus + Config.FLAT_DMG
-
-        damage_taken = dmg * (dmg / (self.defense + dmg)) + total_flat
-        self.health -= damage_taken
-
+    def on_damaged(self, dmg):
         self.game_manager.damage_logger.log(
             "damage_taken",
             damage=dmg
         )
 
-        self.invincible = True
-        self.invincible_start = time.time()
-
-        if self.health <= 0:
-            self.die()
-        else:
-            health_left = self.health/self.max_health
-            red = int(255*(1-health_left))
-            green = int(255*health_left)
-            self.health_color = (red, green, 0)
-
     def process_input(self):
         keys = pg.key.get_pressed()
         dx = dy = 0
@@ -80,35 +62,19 @@ class Player(Entity):
 
         return dx, dy, apply_buff, cast_aoe, shoot_projectile, mouse_dir
 
-    def handle_movement(self, dx, dy, wall_rects):
+    def handle_movement(self, dx, dy):
         # Normalize diagonal movement
         if dx != 0 and dy != 0:
             scale = 1 / (2 ** 0.5)
             dx *= scale
             dy *= scale
 
-        speed = self.speed + self.active_buffs.get("speed", {}).get("value", 0)
+        speed = self.speed + self.buff_value("speed")
         rect = pg.Rect(self.position[0], self.position[1], self.size, self.size)
 
-        # Horizontal collision
-        rect.x += int(dx * speed)
-        for wall in wall_rects:
-            if rect.colliderect(wall):
-                if dx > 0:
-                    rect.right = wall.left
-                elif dx < 0:
-                    rect.left = wall.right
-
-        # Vertical collision
-        rect.y += int(dy * speed)
-        for wall in wall_rects:
-            if rect.colliderect(wall):
-                if dy > 0:
-                    rect.bottom = wall.top
-                elif dy < 0:
-                    rect.top = wall.bottom
-
-        self.position = (rect.x, rect.y)
+        # Axis by axis, sliding along whatever wall stops us
+        self.position = self.map.resolve_move(rect.x, rect.y, rect.width, rect.height,
+                                              int(dx * speed), int(dy * speed))
         self.update_center()
 
     def update(self, targets, camera):
@@ -133,7 +99,7 @@ class Player(Entity):
 
         # movement + state logic
         if self.state != "casting":
-            self.handle_movement(dx, dy, self.map.get_wall_rects())
+            self.handle_movement(dx, dy)
 
         # state logic
         if self.state != "casting":
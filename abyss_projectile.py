@@ -1,8 +1,33 @@
 import pygame as pg
 import math
-from abyss_utils import circle_rect_collision
+from abyss_utils import sweep_circle_rect
+from object_pool import ObjectPool
+
+def first_impact(start, end, radius, team_id, game_map, targets):
+    """Earliest hit of a projectile moving start -> end: (t, target), target None for a wall, or None."""
+    wall_hit = game_map.sweep_box(start, end, radius)
+
+    # The team check rules out the caster's side
+    target_hit = None
+    for target in targets:
+        if not target or target.state == "dead":
+            continue
+        if target.team_id == team_id:
+            continue
+        t = sweep_circle_rect(start, end, radius, target.get_rect())
+        if t is not None and (target_hit is None or t < target_hit[0]):
+            target_hit = (t, target)
+
+    # A wall checked first wins ties, as it always has
+    if wall_hit and (target_hit is None or wall_hit[0] <= target_hit[0]):
+        return wall_hit[0], None
+    return target_hit
+
 
 class Projectile:
+    __slots__ = ("system", "slot", "caster", "_position", "direction", "radius", "speed", "base_damage",
+                 "multiplier", "angle", "length", "width", "damage", "active", "impact_time")
+
     def __init__(self, caster, position, direction, radius=4, speed=10.0, base_damage=20, multiplier=0.75):
         """
         caster     : Entity that fired it (used for team, damage, amplification)
@@ -12,6 +37,13 @@ class Projectile:
         speed      : movement speed in pixels/frame
         base_damage: raw attack stat (caster.attack)
         """
+        self.reset(caster, position, direction, radius, speed, base_damage, multiplier)
+
+    def reset(self, caster, position, direction, radius=4, speed=10.0, base_damage=20, multiplier=0.75):
+        # Set while a ProjectileSystem owns the live state; this object is then a view of its slot
+        self.system = None
+        self.slot = None
+
         self.caster = caster
         self.position = list(position)
         self.direction = direction
@@ -25,40 +57,62 @@ class Projectile:
         self.width = 4
 
         # Amplified damage
-        amp = caster.amplifiers.get("projectile", 0)
+        amp = caster.projectile_amp
         self.damage = base_damage * (1 + amp / 100) * self.multiplier
 
         self.active = True
+        self.impact_time = None  # fraction of the last step at which it hit something
+
+    @property
+    def position(self):
+        if self.system is not None:
+            return self.system.position[self.slot]
+        return self._position
 
-    def update(self, wall_rects, targets):
+    @position.setter
+    def position(self, value):
+        if self.system is not None:
+            self.system.position[self.slot] = value
+        else:
+            self._position = list(value)
+
+    def attach(self, system, slot):
+        self.system, self.slot = system, slot
+
+    def detach(self):
+        # Keep the last state so the object still reads correctly on its own
+        self._position = [float(v) for v in self.system.position[self.slot]]
+        self.system = self.slot = None
+
+    def update(self, game_map, targets, spatial_hash=None):
         if not self.active:
             return
 
-        # Move
-        self.position[0] += self.direction[0] * self.speed
-        self.position[1] += self.direction[1] * self.speed
-
-        # Check wall collision
-        rect = pg.Rect(self.position[0] - self.radius, self.position[1] - self.radius,
-                       self.radius * 2, self.radius * 2)
-        for wall in wall_rects:
-            if rect.colliderect(wall):
-                print(f"Projectile hit wall")
-                self.active = False
-                return
-
-        # Check target collision
-        for target in targets:
-            if not target or target.state == "dead":
-                continue
-            if target.team_id == self.caster.team_id:
-                continue
-
-            if circle_rect_collision(self.position, self.radius, target.get_rect()):
-                target.take_damage(self.damage, self.caster)
-                print(f"{self.caster.team_id} deal {self.damage:.1f} damage (Projectile)")
-                self.active = False
-                return
+        # Sweep this frame's whole move, so fast shots cannot skip over thin walls or enemies
+        x, y = self.position
+        start = (float(x), float(y))  # plain floats, also when the position is a system's array row
+        end = (start[0] + self.direction[0] * self.speed, start[1] + self.direction[1] * self.speed)
+
+        # A hash of every live entity narrows targets to those along the path
+        if spatial_hash is not None:
+            targets = spatial_hash.candidates_near_segment(start, end, self.radius + 1)
+        hit = first_impact(start, end, self.radius, self.caster.team_id, game_map, targets)
+        if hit is None:
+            self.position = end
+            return
+
+        t, target = hit
+        self.impact_time = t
+        self.position = (start[0] + (end[0] - start[0]) * t, start[1] + (end[1] - start[1]) * t)
+        self.active = False
+        self.apply_hit(target)
+
+    def apply_hit(self, target):
+        if target is None:
+            print(f"Projectile hit wall")
+        else:
+            target.take_damage(self.damage, self.caster)
+            print(f"{self.caster.team_id} deal {self.damage:.1f} damage (Projectile)")
 
     def draw(self, surface, camera, color=(255, 255, 0), outline_color=(0, 0, 0)):
         if not self.active:
@@ -75,3 +129,4 @@ class Projectile:
         pg.draw.circle(surface, color, center, radius)
 
 
+projectile_pool = ObjectPool(Projectile)
@@ -1,3 +1,5 @@
+import math
+import numpy as np
 
 
 def circle_rect_collision(circle_center, radius, rect):
@@ -10,3 +12,158 @@ def circle_rect_collision(circle_center, radius, rect):
     dy = cy - closest_y
 
     return dx * dx + dy * dy <= radius * radius
+
+
+def circle_rects_collision(circle_center, radius, left, top, right, bottom):
+    """circle_rect_collision against arrays of rect edges at once; radius may be an array too."""
+    cx, cy = circle_center
+    dx = cx - np.maximum(left, np.minimum(cx, right))
+    dy = cy - np.maximum(top, np.minimum(cy, bottom))
+    return dx * dx + dy * dy <= radius * radius
+
+
+def pack_rects(entities):
+    """left, top, right, bottom float arrays of the entities' rects."""
+    rects = np.array([tuple(entity.get_rect()) for entity in entities], dtype=np.float64).reshape(-1, 4)
+    left, top = rects[:, 0], rects[:, 1]
+    return left, top, left + rects[:, 2], top + rects[:, 3]
+
+
+class TargetPack:
+    """Snapshot of entities as parallel arrays (rect edges, team ids, alive), for array hit tests.
+
+    Build one per frame and share it between the attacks resolved in that frame.
+    """
+
+    def __init__(self, entities):
+        self.entities = list(entities)
+        store = getattr(self.entities[0], "store", None) if self.entities else None
+        if store is not None and all(getattr(entity, "store", None) is store for entity in self.entities):
+            # Entities of one EntityStore: gather their columns instead of asking each one
+            ids = store.ids(self.entities)
+            self.left, self.top, self.right, self.bottom = store.rects(ids)
+            self.teams = np.array(store.names["team"], dtype=str)[store.team[ids]]
+            self.alive = store.state[ids] != store.DEAD
+            return
+        self.left, self.top, self.right, self.bottom = pack_rects(self.entities)
+        self.teams = np.array([entity.team_id for entity in self.entities], dtype=str)
+        self.alive = np.array([entity.state != "dead" for entity in self.entities], dtype=bool)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def rects(self):
+        return self.left, self.top, self.right, self.bottom
+
+
+def sweep_box_rect(start, end, half_size, rect):
+    """Fraction t in [0, 1) of the move start -> end at which a square of half_size centred
+    on the moving point starts to overlap rect (strictly, like colliderect), or None."""
+    t_enter, t_exit = -math.inf, math.inf
+    for p, q, lo, hi in ((start[0], end[0], rect.left - half_size, rect.right + half_size),
+                         (start[1], end[1], rect.top - half_size, rect.bottom + half_size)):
+        d = q - p
+        if d == 0:
+            if not lo < p < hi:
+                return None
+            continue
+        t0, t1 = (lo - p) / d, (hi - p) / d
+        if t0 > t1:
+            t0, t1 = t1, t0
+        t_enter, t_exit = max(t_enter, t0), min(t_exit, t1)
+    if t_enter >= t_exit or t_exit <= 0 or t_enter >= 1:
+        return None
+    return max(t_enter, 0.0)
+
+
+def sweep_circle_rect(start, end, radius, rect):
+    """Fraction t in [0, 1] of the move start -> end at which the circle first touches rect
+    (inclusive, like circle_rect_collision), or None."""
+    if circle_rect_collision(start, radius, rect):
+        return 0.0
+
+    # Ray against rect grown by radius; entering through a corner square means the rounded corner
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    t_enter, t_exit = -math.inf, math.inf
+    for p, d, lo, hi in ((start[0], dx, rect.left - radius, rect.right + radius),
+                         (start[1], dy, rect.top - radius, rect.bottom + radius)):
+        if d == 0:
+            if not lo <= p <= hi:
+                return None
+            continue
+        t0, t1 = (lo - p) / d, (hi - p) / d
+        if t0 > t1:
+            t0, t1 = t1, t0
+        t_enter, t_exit = max(t_enter, t0), min(t_exit, t1)
+    if t_enter > t_exit or t_enter > 1 or t_exit < 0:
+        return None
+
+    # Starting inside the grown rect without touching means starting in a corner square
+    t_enter = max(t_enter, 0.0)
+    x, y = start[0] + dx * t_enter, start[1] + dy * t_enter
+    if rect.left <= x <= rect.right or rect.top <= y <= rect.bottom:
+        return t_enter
+
+    corner_x = rect.left if x < rect.left else rect.right
+    corner_y = rect.top if y < rect.top else rect.bottom
+    fx, fy = start[0] - corner_x, start[1] - corner_y
+    a = dx * dx + dy * dy
+    b = fx * dx + fy * dy
+    c = fx * fx + fy * fy - radius * radius
+    disc = b * b - a * c
+    if disc < 0 or a == 0:
+        return None  # misses the corner, or is not moving at all
+    t = (-b - math.sqrt(disc)) / a
+    return t if 0 <= t <= 1 else None
+
+
+def grid_cells_on_segment(start, end, cell_size):
+    """Grid DDA (Amanatides & Woo); both side cells are visited when the segment passes a corner."""
+    x, y = int(start[0] // cell_size), int(start[1] // cell_size)
+    end_x, end_y = int(end[0] // cell_size), int(end[1] // cell_size)
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    step_x = (dx > 0) - (dx < 0)
+    step_y = (dy > 0) - (dy < 0)
+    t_max_x = ((x + (step_x > 0)) * cell_size - start[0]) / dx if dx else math.inf
+    t_max_y = ((y + (step_y > 0)) * cell_size - start[1]) / dy if dy else math.inf
+    t_delta_x = cell_size / abs(dx) if dx else math.inf
+    t_delta_y = cell_size / abs(dy) if dy else math.inf
+
+    yield x, y
+    for _ in range(abs(end_x - x) + abs(end_y - y)):
+        if (x, y) == (end_x, end_y):
+            return
+        if t_max_x < t_max_y:
+            x += step_x
+            t_max_x += t_delta_x
+        elif t_max_y < t_max_x:
+            y += step_y
+            t_max_y += t_delta_y
+        else:
+            yield x + step_x, y
+            yield x, y + step_y
+            x += step_x
+            y += step_y
+            t_max_x += t_delta_x
+            t_max_y += t_delta_y
+        yield x, y
+
+
+def grid_cells_near_segment(start, end, pad, cell_size):
+    """Every cell within pad (per axis) of the segment, each once: the segment's own cells plus those
+    of copies shifted to the four corners. Cost grows with the length, not the bounding box."""
+    x0, x1 = int((min(start[0], end[0]) - pad) // cell_size), int((max(start[0], end[0]) + pad) // cell_size)
+    y0, y1 = int((min(start[1], end[1]) - pad) // cell_size), int((max(start[1], end[1]) + pad) // cell_size)
+    if (x1 - x0 + 1) * (y1 - y0 + 1) <= 9:
+        # A short hop: its bounding box is cheaper than five marches
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                yield x, y
+        return
+
+    visited = set()
+    for ox, oy in ((0, 0), (-pad, -pad), (pad, -pad), (-pad, pad), (pad, pad)):
+        for cell in grid_cells_on_segment((start[0] + ox, start[1] + oy), (end[0] + ox, end[1] + oy), cell_size):
+            if cell not in visited:
+                visited.add(cell)
+                yield cell
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import time
+import numpy as np
+from config import Config
+
+
+class VisibilityTable:
+    """Baked line of sight between tile centres, one bitset per tile over its DETECTION_DISTANCE window."""
+
+    VERSION = 1
+
+    def __init__(self, game_map, max_distance=Config.DETECTION_DISTANCE):
+        self.map = game_map
+        self.max_distance = max_distance
+        ts = game_map.tile_size
+        self.radius = int(max_distance // ts)  # window half-width in tiles
+        self.side = 2 * self.radius + 1
+        self.stride = (self.side * self.side + 7) // 8  # bytes per tile
+        self.max_d2 = (max_distance / ts) ** 2
+        self.bits = b""
+        self.stale = set()  # origins near an edited tile fall back to the live DDA test
+        self.bake_seconds = 0.0
+        self.loaded_from_disk = False
+        game_map.change_listeners.append(self.on_tile_changed)
+
+    @classmethod
+    def load_or_bake(cls, game_map, max_distance=Config.DETECTION_DISTANCE):
+        table = cls(game_map, max_distance)
+        if not table.load():
+            table.bake()
+            table.save()
+        return table
+
+    @classmethod
+    def load_baked(cls, game_map, max_distance=Config.DETECTION_DISTANCE):
+        """Table baked earlier (e.g. by benchmark.py visibility), or None; never bakes."""
+        table = cls(game_map, max_distance)
+        if table.load():
+            return table
+        game_map.change_listeners.remove(table.on_tile_changed)
+        return None
+
+    def map_hash(self):
+        return hashlib.sha1(np.ascontiguousarray(self.map.codes).tobytes()).hexdigest()
+
+    def cache_path(self):
+        key = f"visibility_{self.map_hash()[:16]}_{self.map.tile_size}_{self.max_distance}_v{VisibilityTable.VERSION}"
+        return os.path.join(Config.MAP_CACHE_DIR, key + ".npz")
+
+    def load(self):
+        path = self.cache_path()
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                header_ok = (int(data["version"]) == VisibilityTable.VERSION
+                             and str(data["map_hash"]) == self.map_hash()
+                             and tuple(data["bits"].shape) == (self.map.rows * self.map.cols, self.stride))
+                if not header_ok:
+                    return False
+                self.bits = data["bits"].tobytes()
+        except (OSError, ValueError, KeyError):
+            return False  # unreadable table, bake again
+        self.loaded_from_disk = True
+        return True
+
+    def save(self):
+        bits = np.frombuffer(self.bits, dtype=np.uint8).reshape(self.map.rows * self.map.cols, self.stride)
+        try:
+            os.makedirs(Config.MAP_CACHE_DIR, exist_ok=True)
+            np.savez_compressed(self.cache_path(), version=VisibilityTable.VERSION,
+                                map_hash=self.map_hash(), bits=bits)
+        except OSError as e:
+            print(f"Could not write visibility table: {e}")
+
+    def bake(self):
+        game_map, ts, r = self.map, self.map.tile_size, self.radius
+        half = ts // 2
+        offsets = [(dx, dy) for dy in range(-r, r + 1) for dx in range(-r, r + 1)
+                   if dx * dx + dy * dy <= self.max_d2]
+        table = np.zeros((game_map.rows * game_map.cols, self.side * self.side), dtype=bool)
+
+        start = time.perf_counter()
+        # Wall tiles stay all-zero: a centre inside a collider never has line of sight
+        for x, y in game_map.walkable:
+            origin = (x * ts + half, y * ts + half)
+            row = table[y * game_map.cols + x]
+            for dx, dy in offsets:
+                tx, ty = x + dx, y + dy
+                if game_map.is_walkable(tx, ty) and game_map.has_line_of_sight(
+                        origin, (tx * ts + half, ty * ts + half)):
+                    row[(dy + r) * self.side + dx + r] = True
+        self.bake_seconds = time.perf_counter() - start
+
+        self.bits = np.packbits(table, axis=1, bitorder="little").tobytes()
+        self.stale.clear()
+
+    def visible(self, a, b):
+        """LOS between the centres of tiles a and b, or None when b is outside the baked window."""
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        if dx * dx + dy * dy > self.max_d2 or a in self.stale:
+            return None
+        x, y = a
+        if not (0 <= x < self.map.cols and 0 <= y < self.map.rows):
+            return None
+        k = (dy + self.radius) * self.side + dx + self.radius
+        return bool(self.bits[(y * self.map.cols + x) * self.stride + (k >> 3)] >> (k & 7) & 1)
+
+    def tiles_visible(self, a, b):
+        # Outside the table, answer with the live test between the same centres
+        clear = self.visible(a, b)
+        if clear is None:
+            ts = self.map.tile_size
+            half = ts // 2
+            clear = self.map.has_line_of_sight((a[0] * ts + half, a[1] * ts + half),
+                                               (b[0] * ts + half, b[1] * ts + half))
+        return clear
+
+    def on_tile_changed(self, x, y):
+        # Any baked ray through (x, y) starts within radius + 1 tiles of it
+        reach = self.radius + 1
+        self.stale.update((x + dx, y + dy) for dx in range(-reach, reach + 1)
+                          for dy in range(-reach, reach + 1))
+
+    def memory_bytes(self):
+        return len(self.bits)
@@ -0,0 +1,1206 @@
+"""Headless performance checks. Run e.g. `python benchmark.py jps`."""
+import argparse
+import contextlib
+import gc
+import heapq
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pygame as pg
+from PIL import Image
+from config import Config
+from abyss_map import Map
+from abyss_visibility import VisibilityTable
+from pathfinder import AStarPathfinder, HierarchicalPathfinder, MovingTargetPlanner, PathRequestQueue
+from path_workers import PathWorkerPool
+from spatial_hash import SpatialHash
+from abyss_entity import Entity
+from entity_store import EntityStore, take_damage_many
+from abyss_aoe_attack import AOEAttack, aoe_pool
+from object_pool import ObjectPool
+from abyss_buff import Buff
+from abyss_chest import Chest
+from abyss_projectile import Projectile
+from projectile_system import ProjectileSystem
+from abyss_utils import TargetPack, circle_rect_collision, pack_rects, sweep_box_rect, sweep_circle_rect
+
+
+def path_cost(path):
+    return sum(14 if a[0] != b[0] and a[1] != b[1] else 10 for a, b in zip(path, path[1:]))
+
+
+def load_stage_maps():
+    return {key: Map(path, Config.TILE_SIZE) for key, path in Config.MAP_LAYOUT.items()}
+
+
+def random_queries(game_map, count, seed):
+    rng = random.Random(seed)
+    return [(rng.choice(game_map.walkable), rng.choice(game_map.walkable)) for _ in range(count)]
+
+
+def run_queries(pathfinder, queries):
+    paths, expanded = [], 0
+    start = time.perf_counter()
+    for s, g in queries:
+        paths.append(pathfinder.find_path(s, g))
+        expanded += pathfinder.last_expanded
+    return paths, expanded, time.perf_counter() - start
+
+
+def reference_astar(pathfinder, start, goal):
+    """The tuple/dict A* core that the flat-array one replaced, kept as a baseline."""
+    open_set = [(0, 0, start)]
+    came_from = {}
+    g_score = {start: 0}
+    expanded = 0
+    while open_set:
+        _, _, current = heapq.heappop(open_set)
+        expanded += 1
+        if current == goal:
+            return pathfinder.reconstruct_path(came_from, current), expanded
+        for neighbor, move_cost in pathfinder._neighbors_off_grid(current):
+            tentative_g = g_score[current] + move_cost
+            if neighbor not in g_score or tentative_g < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g
+                f = tentative_g + pathfinder.heuristic(neighbor, goal)
+                heapq.heappush(open_set, (f, pathfinder.heuristic(neighbor, goal), neighbor))
+    return [], expanded
+
+
+def bench_astar(args):
+    """Flat-array A* core against the old tuple/dict core (and JPS for reference)."""
+    mismatches = 0
+    for key, game_map in load_stage_maps().items():
+        queries = random_queries(game_map, args.queries, args.seed)
+        pathfinder = AStarPathfinder(game_map, jump_points=False, cache_size=0)
+
+        start = time.perf_counter()
+        reference = [reference_astar(pathfinder, s, g) for s, g in queries]
+        reference_time = time.perf_counter() - start
+        flat_paths, flat_expanded, flat_time = run_queries(pathfinder, queries)
+        _, _, jps_time = run_queries(AStarPathfinder(game_map, jump_points=True, cache_size=0), queries)
+
+        for (s, g), (expected, _), path in zip(queries, reference, flat_paths):
+            if expected != path:
+                mismatches += 1
+                print(f"  path mismatch {s} -> {g}: cost {path_cost(expected)} vs {path_cost(path)}")
+
+        reference_expanded = sum(expanded for _, expanded in reference)
+        print(f"{key}: {len(queries)} queries")
+        print(f"  tuple A*  {reference_time * 1000:8.1f} ms  ({reference_expanded} pops)")
+        print(f"  flat A*   {flat_time * 1000:8.1f} ms  ({flat_expanded} expansions)"
+              f"  x{reference_time / max(flat_time, 1e-9):.2f}")
+        print(f"  JPS       {jps_time * 1000:8.1f} ms")
+
+    print("paths identical" if not mismatches else f"{mismatches} path mismatches")
+    return 1 if mismatches else 0
+
+
+def bench_jps(args):
+    """Compare Jump Point Search against plain A*: path cost, nodes expanded and time."""
+    mismatches = 0
+    for key, game_map in load_stage_maps().items():
+        queries = random_queries(game_map, args.queries, args.seed)
+        astar_paths, astar_expanded, astar_time = run_queries(AStarPathfinder(game_map, jump_points=False), queries)
+        jps_paths, jps_expanded, jps_time = run_queries(AStarPathfinder(game_map, jump_points=True), queries)
+
+        for (s, g), a, j in zip(queries, astar_paths, jps_paths):
+            if bool(a) != bool(j) or path_cost(a) != path_cost(j):
+                mismatches += 1
+                print(f"  cost mismatch {s} -> {g}: A* {path_cost(a)} vs JPS {path_cost(j)}")
+
+        print(f"{key}: {len(queries)} queries")
+        print(f"  A*  expanded {astar_expanded:>9}  {astar_time * 1000:8.1f} ms")
+        print(f"  JPS expanded {jps_expanded:>9}  {jps_time * 1000:8.1f} ms")
+        print(f"  speedup x{astar_time / max(jps_time, 1e-9):.2f}, "
+              f"expansions x{astar_expanded / max(jps_expanded, 1):.1f}")
+
+    print("paths equivalent" if not mismatches else f"{mismatches} cost mismatches")
+    return 1 if mismatches else 0
+
+
+def bench_hpa(args):
+    """Long-range queries through HPA* versus flat A*: planning time and path length."""
+    for key, game_map in load_stage_maps().items():
+        pathfinder = AStarPathfinder(game_map)
+        start = time.perf_counter()
+        planner = HierarchicalPathfinder(pathfinder)
+        build_time = time.perf_counter() - start
+
+        queries = [(s, g) for s, g in random_queries(game_map, args.queries * 4, args.seed)
+                   if planner.is_long_range(s, g)][:args.queries]
+        flat_paths, _, flat_time = run_queries(pathfinder, queries)
+
+        ratios, plan_time = [], 0.0
+        for (s, g), flat in zip(queries, flat_paths):
+            start = time.perf_counter()
+            plan = planner.plan(s, g)
+            plan_time += time.perf_counter() - start
+            if plan is None or not flat:
+                continue
+            path = [s]
+            while not plan.done:
+                path += plan.next_segment()
+            ratios.append(path_cost(path) / max(path_cost(flat), 1))
+
+        print(f"{key}: {len(planner.edges)} entrance nodes, built in {build_time * 1000:.1f} ms")
+        print(f"  flat A*    {flat_time * 1000:8.1f} ms for {len(queries)} long-range queries")
+        print(f"  HPA* plan  {plan_time * 1000:8.1f} ms (refinement happens while walking)")
+        if ratios:
+            print(f"  path length vs optimal: mean x{sum(ratios) / len(ratios):.3f}, worst x{max(ratios):.3f}")
+    return 0
+
+
+def bench_cache(args):
+    """Path cache hit rate for a stream of requests toward a few moving goals."""
+    for key, game_map in load_stage_maps().items():
+        rng = random.Random(args.seed)
+        goals = [rng.choice(game_map.walkable) for _ in range(8)]
+        enemies = [rng.choice(game_map.walkable) for _ in range(40)]
+        queries = [(rng.choice(enemies), rng.choice(goals)) for _ in range(args.queries)]
+
+        print(f"{key}: {len(queries)} requests from {len(enemies)} starts to {len(goals)} goals")
+        for size in (0, 16, 64, 128, 512):
+            pathfinder = AStarPathfinder(game_map, cache_size=size)
+            _, _, elapsed = run_queries(pathfinder, queries)
+            stats = pathfinder.cache_stats()
+            print(f"  size {size:>4}: hit rate {stats['hit_rate']:6.1%} "
+                  f"({stats['hits']} exact, {stats['suffix_hits']} suffix)  {elapsed * 1000:8.1f} ms")
+    return 0
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def simulate_enemy_frames(game_map, pathfinder, queue, enemies, frames, seed):
+    """Main-thread cost per frame when every enemy repaths each time the player changes tile."""
+    rng = random.Random(seed)
+    starts = [rng.choice(game_map.walkable) for _ in range(enemies)]
+    frame_times, pending = [], {}
+    for frame in range(frames):
+        start = time.perf_counter()
+        if frame % 15 == 0:  # the player steps onto a new tile about four times a second
+            goal = rng.choice(game_map.walkable)
+            for i, tile in enumerate(starts):
+                if queue is None:
+                    pathfinder.find_path(tile, goal)
+                else:
+                    pending[i] = queue.request(i, tile, goal)
+        if queue is not None:
+            queue.run()
+        frame_times.append(time.perf_counter() - start)
+    done = sum(1 for r in pending.values() if r.done) if queue is not None else len(starts)
+    return frame_times, done
+
+
+def bench_workers(args):
+    """Main-thread frame time for 60 chasing enemies: synchronous, budgeted queue, worker pool."""
+    enemies, frames = 60, 120
+    for key, game_map in load_stage_maps().items():
+        print(f"{key}: {enemies} enemies, {frames} frames, path cache off")
+        modes = [
+            ("synchronous", lambda pf: None),
+            ("budget queue", lambda pf: PathRequestQueue(pf)),
+            ("queue + replan", lambda pf: PathRequestQueue(pf, replanner=MovingTargetPlanner(pf))),
+            (f"{args.workers} workers", lambda pf: PathWorkerPool(pf, workers=args.workers)),
+        ]
+        for label, make_queue in modes:
+            pathfinder = AStarPathfinder(game_map, cache_size=0)
+            queue = make_queue(pathfinder)
+            if isinstance(queue, PathWorkerPool):
+                queue.executor.submit(int).result()  # wait for the workers to boot
+            times, done = simulate_enemy_frames(game_map, pathfinder, queue, enemies, frames, args.seed)
+            if queue is not None:
+                queue.shutdown()
+            print(f"  {label:<14} mean {sum(times) / len(times) * 1000:6.2f} ms  "
+                  f"p99 {percentile(times, 99) * 1000:7.2f} ms  max {max(times) * 1000:7.2f} ms  "
+                  f"({done}/{enemies} of the last batch delivered)")
+    return 0
+
+
+def bench_los(args):
+    """Grid DDA line of sight against clipline over every wall tile: agreement and time."""
+    ts = Config.TILE_SIZE
+    mismatches = 0
+    for key, game_map in load_stage_maps().items():
+        walls = [pg.Rect(x * ts, y * ts, ts, ts)
+                 for y, row in enumerate(game_map.grid) for x, tile in enumerate(row) if tile == Map.WALL]
+        rng = random.Random(args.seed)
+        segments = []
+        for _ in range(args.queries * 10):
+            start = (rng.uniform(0, game_map.cols * ts), rng.uniform(0, game_map.rows * ts))
+            reach = Config.DETECTION_DISTANCE
+            segments.append((start, (start[0] + rng.uniform(-reach, reach), start[1] + rng.uniform(-reach, reach))))
+
+        start = time.perf_counter()
+        expected = [not any(wall.clipline(a, b) for wall in walls) for a, b in segments]
+        brute_time = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = [game_map.has_line_of_sight(a, b) for a, b in segments]
+        dda_time = time.perf_counter() - start
+
+        for (a, b), want, got in zip(segments, expected, actual):
+            if want != got:
+                mismatches += 1
+                print(f"  mismatch {a} -> {b}: clipline {want}, DDA {got}")
+
+        # One target, many origins: the ranged ring round a player, and scattered origins in range
+        ring = Config.RANGED_RING_RADIUS
+        groups = []
+        for _ in range(args.queries):
+            tx, ty = rng.choice(game_map.walkable)
+            target = ((tx + rng.random()) * ts, (ty + rng.random()) * ts)
+            origins = [((tx + dx) * ts + ts // 2, (ty + dy) * ts + ts // 2)
+                       for dx in range(-ring, ring + 1) for dy in range(-ring, ring + 1)
+                       if abs(dx) == ring or abs(dy) == ring]
+            reach = Config.DETECTION_DISTANCE
+            origins += [(target[0] + rng.uniform(-reach, reach), target[1] + rng.uniform(-reach, reach))
+                        for _ in range(16)]
+            groups.append((origins, target))
+
+        start = time.perf_counter()
+        expected = [[game_map.has_line_of_sight(a, b) for a in origins] for origins, b in groups]
+        single_time = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = [game_map.line_of_sight_many(origins, b) for origins, b in groups]
+        many_time = time.perf_counter() - start
+
+        for (origins, b), want, got in zip(groups, expected, actual):
+            for a, w, g in zip(origins, want, got):
+                if w != g:
+                    mismatches += 1
+                    print(f"  mismatch {a} -> {b}: per ray {w}, batched {g}")
+
+        print(f"{key}: {len(segments)} segments against {len(walls)} wall tiles")
+        print(f"  clipline scan {brute_time * 1000:8.1f} ms")
+        print(f"  grid DDA      {dda_time * 1000:8.1f} ms  (x{brute_time / max(dda_time, 1e-9):.1f})")
+        print(f"  {len(groups)} targets x {len(groups[0][0])} origins: per ray {single_time * 1000:8.1f} ms  "
+              f"batched {many_time * 1000:8.1f} ms  (x{single_time / max(many_time, 1e-9):.1f})")
+
+    print("line of sight equivalent" if not mismatches else f"{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+def bench_colliders(args):
+    """Merged wall colliders against one per tile: movement, projectile sweeps and line of sight."""
+    ts = Config.TILE_SIZE
+    mismatches = 0
+    for key, path in Config.MAP_LAYOUT.items():
+        merged, tiled = Map(path, ts, merge_walls=True), Map(path, ts, merge_walls=False)
+        rng = random.Random(args.seed)
+        width, height = merged.cols * ts, merged.rows * ts
+
+        # Moves from anywhere, starts inside walls included, with integer and float steps
+        moves = []
+        for i in range(args.queries * 20):
+            size = rng.choice((16, 24, 32, 40, 48))
+            x, y = rng.uniform(-ts, width), rng.uniform(-ts, height)
+            dx, dy = rng.uniform(-12, 12), rng.uniform(-12, 12)
+            if i % 2:
+                x, y, dx, dy = int(x), int(y), int(dx), int(dy)
+            moves.append((x, y, size, dx, dy))
+        inside_wall = sum(1 for x, y, size, _, _ in moves if tiled.query_walls_rect((x, y, size, size)))
+        start = time.perf_counter()
+        got = [merged.resolve_move(x, y, size, size, dx, dy) for x, y, size, dx, dy in moves]
+        move_time = time.perf_counter() - start
+        for move, a in zip(moves, got):
+            b = tiled.resolve_move(move[0], move[1], move[2], move[2], move[3], move[4])
+            if a != b:
+                mismatches += 1
+                print(f"  move mismatch {move}: merged {a}, per tile {b}")
+
+        # Walks from walkable tiles, each step starting where the last one ended
+        walk_steps = 0
+        for _ in range(args.queries // 5):
+            tx, ty = rng.choice(merged.walkable)
+            a = b = (tx * ts + 4, ty * ts + 4)
+            for _ in range(100):
+                dx, dy = rng.choice((-1, 0, 1)) * 5, rng.choice((-1, 0, 1)) * 5
+                a = merged.resolve_move(a[0], a[1], 24, 24, dx, dy)
+                b = tiled.resolve_move(b[0], b[1], 24, 24, dx, dy)
+                walk_steps += 1
+            if a != b:
+                mismatches += 1
+                print(f"  walk from {(tx, ty)} ended at {a} merged, {b} per tile")
+
+        # Projectile sweeps and line of sight from walkable points
+        segments = []
+        for _ in range(args.queries * 10):
+            x, y = rng.choice(merged.walkable)
+            a = ((x + rng.random()) * ts, (y + rng.random()) * ts)
+            angle, reach = rng.uniform(0, 2 * math.pi), rng.choice((6.0, 24.0, 96.0, Config.DETECTION_DISTANCE))
+            segments.append((a, (a[0] + reach * math.cos(angle), a[1] + reach * math.sin(angle)), rng.choice((2, 4, 8))))
+        for a, b, r in segments:
+            hit_merged, hit_tiled = merged.sweep_box(a, b, r), tiled.sweep_box(a, b, r)
+            if (hit_merged and hit_merged[0]) != (hit_tiled and hit_tiled[0]):
+                mismatches += 1
+                print(f"  sweep mismatch {a} -> {b} r={r}: merged {hit_merged}, per tile {hit_tiled}")
+        start = time.perf_counter()
+        sight = [merged.has_line_of_sight(a, b) for a, b, _ in segments]
+        merged_time = time.perf_counter() - start
+        start = time.perf_counter()
+        sight_tiled = [tiled.has_line_of_sight(a, b) for a, b, _ in segments]
+        tiled_time = time.perf_counter() - start
+        for (a, b, _), want, got_sight in zip(segments, sight_tiled, sight):
+            if want != got_sight:
+                mismatches += 1
+                print(f"  sight mismatch {a} -> {b}: merged {got_sight}, per tile {want}")
+
+        print(f"{key}: {len(merged.wall_colliders)} merged colliders for {len(tiled.wall_colliders)} wall tiles")
+        print(f"  {len(moves)} moves ({inside_wall} starting inside a wall) in {move_time * 1000:.1f} ms, "
+              f"{walk_steps} walk steps")
+        print(f"  {len(segments)} sweeps and sight lines: sight merged {merged_time * 1000:.1f} ms, "
+              f"per tile {tiled_time * 1000:.1f} ms")
+
+    print("colliders equivalent" if not mismatches else f"{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+def bench_visibility(args):
+    """Bake (or load) the visibility table, check it against the live test and time lookups."""
+    ts = Config.TILE_SIZE
+    half = ts // 2
+    mismatches = 0
+    for key, game_map in load_stage_maps().items():
+        start = time.perf_counter()
+        table = VisibilityTable.load_or_bake(game_map)
+        load_time = time.perf_counter() - start
+        source = "loaded from disk" if table.loaded_from_disk else f"baked in {table.bake_seconds:.2f} s"
+
+        rng = random.Random(args.seed)
+        pairs = []
+        while len(pairs) < args.queries * 20:
+            a = rng.choice(game_map.walkable)
+            b = (a[0] + rng.randint(-table.radius, table.radius), a[1] + rng.randint(-table.radius, table.radius))
+            if table.visible(a, b) is not None:
+                pairs.append((a, b))
+        centres = [((a[0] * ts + half, a[1] * ts + half), (b[0] * ts + half, b[1] * ts + half)) for a, b in pairs]
+
+        start = time.perf_counter()
+        expected = [game_map.has_line_of_sight(a, b) for a, b in centres]
+        live_time = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = [table.visible(a, b) for a, b in pairs]
+        table_time = time.perf_counter() - start
+
+        for (a, b), want, got in zip(pairs, expected, actual):
+            if want != got:
+                mismatches += 1
+                print(f"  mismatch {a} -> {b}: live {want}, table {got}")
+
+        print(f"{key}: {game_map.cols}x{game_map.rows} tiles, window radius {table.radius} tiles, "
+              f"{table.stride} bytes per tile")
+        print(f"  table {table.memory_bytes() / 1024:.1f} KiB in memory, "
+              f"{os.path.getsize(table.cache_path()) / 1024:.1f} KiB on disk, "
+              f"{source} ({load_time * 1000:.1f} ms total)")
+        print(f"  live DDA   {live_time * 1000:8.1f} ms for {len(pairs)} tile pairs")
+        print(f"  table bit  {table_time * 1000:8.1f} ms  (x{live_time / max(table_time, 1e-9):.1f})")
+
+    print("visibility table equivalent" if not mismatches else f"{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+def bench_replan(args):
+    """Enemies chasing a wandering player: fresh A* per step versus the moving-target planner."""
+    enemies, steps = 20, max(1, args.queries // 10)
+    mismatches = 0
+    for key, game_map in load_stage_maps().items():
+        rng = random.Random(args.seed)
+        pathfinder = AStarPathfinder(game_map, jump_points=False, cache_size=0)
+        planner = MovingTargetPlanner(pathfinder)
+        # The same chase through a small-budget queue, some requests dropped half way for newer ones
+        queue = PathRequestQueue(pathfinder, node_budget=32, time_budget_ms=1000,
+                                 replanner=MovingTargetPlanner(pathfinder))
+        interrupt = random.Random(args.seed + 1)
+        player = rng.choice(game_map.walkable)
+        starts = [rng.choice(game_map.walkable) for _ in range(enemies)]
+        positions = list(starts)
+
+        fresh_time = replan_time = 0.0
+        fresh_expanded = replan_expanded = 0
+        for _ in range(steps):
+            player = rng.choice([n for n, _ in pathfinder.neighbors(player)] or [player])
+            for i, tile in enumerate(positions):
+                start = time.perf_counter()
+                fresh = pathfinder.find_path_astar(tile, player)
+                fresh_time += time.perf_counter() - start
+                fresh_expanded += pathfinder.last_expanded
+
+                start = time.perf_counter()
+                path = planner.replan(i, tile, player)
+                replan_time += time.perf_counter() - start
+                replan_expanded += planner.last_expanded
+
+                request = queue.request(i, tile, player)
+                if interrupt.random() < 0.2:
+                    queue.run()
+                    request = queue.request(i, tile, player)
+                while not request.done:
+                    queue.run()
+
+                for label, got in (("replan", path), ("queued replan", request.path)):
+                    if bool(got) != bool(fresh) or path_cost(got) != path_cost(fresh):
+                        mismatches += 1
+                        print(f"  cost mismatch {tile} -> {player}: A* {path_cost(fresh)} vs {label} {path_cost(got)}")
+                if len(path) >= 3:
+                    positions[i] = path[1]  # enemies step one tile per player step
+
+        calls = steps * enemies
+        print(f"{key}: {enemies} enemies chasing for {steps} player steps "
+              f"({planner.reused} tree reuses, {planner.fresh} fresh trees)")
+        print(f"  fresh A*   expanded {fresh_expanded / calls:8.1f}/call  {fresh_time * 1000:8.1f} ms")
+        print(f"  replanner  expanded {replan_expanded / calls:8.1f}/call  {replan_time * 1000:8.1f} ms")
+        print(f"  speedup x{fresh_time / max(replan_time, 1e-9):.2f}")
+
+    print("paths equivalent" if not mismatches else f"{mismatches} cost mismatches")
+    return 1 if mismatches else 0
+
+
+def bench_hits(args):
+    """Projectile/AOE target lookups: full list scan versus the entity spatial hash."""
+    rng = random.Random(args.seed)
+    world = 80 * Config.TILE_SIZE
+    mismatches = 0
+    for count in (10, 50, 100, 200, 300, 500, 1000):
+        entities = []
+        grid = SpatialHash()
+        store = EntityStore()
+        for _ in range(count):
+            entity = Entity(40, 10, 5, (rng.uniform(0, world), rng.uniform(0, world)), Config.TILE_SIZE, store=store)
+            entity.team_id = "enemy"
+            grid.insert(entity)
+            entity.spatial_hash = grid
+            entities.append(entity)
+        probes = [((rng.uniform(0, world), rng.uniform(0, world)), rng.choice((4, 8, 48, 96)))
+                  for _ in range(args.queries * 4)]
+
+        start = time.perf_counter()
+        expected = [[e for e in entities if circle_rect_collision(c, r, e.get_rect())] for c, r in probes]
+        scan_time = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = [grid.query_circle(c, r) for c, r in probes]
+        hash_time = time.perf_counter() - start
+        mismatches += sum(a != b for a, b in zip(expected, actual))
+
+        # Everyone takes a step, as they would in a frame
+        start = time.perf_counter()
+        for entity in entities:
+            entity.move((rng.choice((-1, 0, 1)), rng.choice((-1, 0, 1))))
+        move_time = time.perf_counter() - start
+        mismatches += sum(grid.cells[e] != grid._rect_span(e.get_rect()) for e in entities)
+
+        print(f"{count:>5} entities, {len(probes)} circle queries: scan {scan_time * 1000:8.1f} ms  "
+              f"hash {hash_time * 1000:7.1f} ms  (x{scan_time / max(hash_time, 1e-9):.1f})  "
+              f"moving all {move_time * 1000:.2f} ms")
+
+    print("hits identical" if not mismatches else f"{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+def reference_aoe_victims(aoe, targets):
+    """The per-target loop AOEAttack.apply_to_targets used to run, collecting instead of damaging."""
+    found = []
+    for target in targets:
+        if target.state == "dead":
+            continue
+        if aoe.target_type == "enemy" and target.team_id == aoe.caster.team_id:
+            continue
+        if aoe.target_type == "player" and target.team_id != "player":
+            continue
+        if circle_rect_collision(aoe.generated_pos, aoe.radius, target.get_rect()):
+            found.append(target)
+    return found
+
+
+def bench_aoe(args):
+    """AOE victims: per-target loop versus one array pass over a shared pack, and through the hash."""
+    rng = random.Random(args.seed)
+    world = 40 * Config.TILE_SIZE
+    mismatches = 0
+    for count in (10, 50, 100, 200, 300, 500, 1000):
+        targets = []
+        grid = SpatialHash()
+        store = EntityStore()
+        for i in range(count):
+            entity = Entity(40, 10, 5, (rng.uniform(0, world), rng.uniform(0, world)), Config.TILE_SIZE, store=store)
+            entity.team_id = "player" if i % 10 == 0 else "enemy"
+            if rng.random() < 0.1:
+                entity.state = Entity.DEAD
+            grid.insert(entity)
+            targets.append(entity)
+        casts = []
+        for _ in range(args.queries):
+            caster = rng.choice(targets)
+            caster.aoe_amp = rng.choice((0, 20, 60))
+            casts.append(AOEAttack(caster, (rng.uniform(0, world), rng.uniform(0, world)),
+                                   base_radius=rng.choice((48, 96, 192)),
+                                   target_type="enemy" if caster.team_id == "player" else "player"))
+
+        start = time.perf_counter()
+        expected = [reference_aoe_victims(aoe, targets) for aoe in casts]
+        loop_time = time.perf_counter() - start
+        start = time.perf_counter()
+        pack = TargetPack(targets)  # packed once, as for every attack resolved in a frame
+        batched = [aoe.victims(pack) for aoe in casts]
+        batch_time = time.perf_counter() - start
+        start = time.perf_counter()
+        hashed = [aoe.victims(targets, grid) for aoe in casts]
+        hash_time = time.perf_counter() - start
+        mismatches += sum(a != b for a, b in zip(expected, batched)) + sum(a != b for a, b in zip(expected, hashed))
+
+        print(f"{count:>5} targets, {len(casts)} casts: loop {loop_time * 1000:8.1f} ms  "
+              f"batched {batch_time * 1000:7.1f} ms (x{loop_time / max(batch_time, 1e-9):.1f})  "
+              f"hash + batched {hash_time * 1000:7.1f} ms (x{loop_time / max(hash_time, 1e-9):.1f})")
+
+    print("aoe victims identical" if not mismatches else f"{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+def bench_sweep(args):
+    """Swept projectile collision: agreement with brute force and sampling, tunnels caught, cost."""
+    mismatches = 0
+    for key, game_map in load_stage_maps().items():
+        rng = random.Random(args.seed)
+        walls = game_map.get_wall_rects()
+        moves = []
+        for _ in range(args.queries * 4):
+            x, y = rng.choice(game_map.walkable)
+            start = ((x + rng.random()) * Config.TILE_SIZE, (y + rng.random()) * Config.TILE_SIZE)
+            angle, speed = rng.uniform(0, 2 * math.pi), rng.choice((6.0, 10.0, 24.0, 48.0, 96.0))
+            moves.append((start, (start[0] + speed * math.cos(angle), start[1] + speed * math.sin(angle)), rng.choice((2, 4, 8))))
+
+        # Grid march against every wall
+        start_time = time.perf_counter()
+        swept = [game_map.sweep_box(a, b, r) for a, b, r in moves]
+        sweep_time = time.perf_counter() - start_time
+        for (a, b, r), hit in zip(moves, swept):
+            times = [t for t in (sweep_box_rect(a, b, r, wall) for wall in walls) if t is not None]
+            if (hit[0] if hit else None) != (min(times) if times else None):
+                mismatches += 1
+                print(f"  wall mismatch {a} -> {b} r={r}: {hit} vs {min(times) if times else None}")
+
+        # The old end-of-step check, and the shots it let through walls
+        start_time = time.perf_counter()
+        stepped = [bool(game_map.query_walls_rect(pg.Rect(b[0] - r, b[1] - r, r * 2, r * 2))) for a, b, r in moves]
+        step_time = time.perf_counter() - start_time
+        tunnels = sum(1 for hit, old in zip(swept, stepped) if hit and not old)
+
+        # Swept circle against entity rects, checked by fine sampling along the move
+        for a, b, r in moves[:args.queries]:
+            rect = pg.Rect(int(a[0]) + rng.randint(-64, 64), int(a[1]) + rng.randint(-64, 64), 32, 32)
+            t = sweep_circle_rect(a, b, r, rect)
+            samples = [i / 512 for i in range(513)]
+            first = next((s for s in samples if circle_rect_collision(
+                (a[0] + (b[0] - a[0]) * s, a[1] + (b[1] - a[1]) * s), r, rect)), None)
+            if (t is None) != (first is None) or (t is not None and not t - 1 / 512 <= first <= t + 1 / 512):
+                mismatches += 1
+                print(f"  entity mismatch {a} -> {b} r={r} {rect}: {t} vs sampled {first}")
+
+        print(f"{key}: {len(moves)} projectile steps")
+        print(f"  end-of-step rect  {step_time * 1000:7.1f} ms")
+        print(f"  swept grid march  {sweep_time * 1000:7.1f} ms, {sum(1 for h in swept if h)} wall hits, "
+              f"{tunnels} of them missed by the old check")
+
+    print("sweeps consistent" if not mismatches else f"{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+def projectile_world(game_map, count, seed, crowd=0):
+    """Fragile entities of two teams on walkable tiles, and count shots fired among them; crowd more
+    enemies spread over the stage afterwards, as a stage full of sleeping ones."""
+    rng = random.Random(seed)
+    ts = Config.TILE_SIZE
+    store = EntityStore()
+    entities = []
+    for i in range(max(count // 4, 4)):
+        x, y = rng.choice(game_map.walkable)
+        entity = Entity(10, 20, 5, (x * ts, y * ts), ts, store=store)
+        entity.team_id = "player" if i % 8 == 0 else "enemy"
+        entities.append(entity)
+    shots = []
+    for _ in range(count):
+        caster = rng.choice(entities)
+        x, y = rng.choice(game_map.walkable)
+        angle = rng.uniform(0, 2 * math.pi)
+        shots.append(Projectile(caster, ((x + rng.random()) * ts, (y + rng.random()) * ts),
+                                (math.cos(angle), math.sin(angle)), radius=rng.choice((2.0, 4.0, 8.0)),
+                                speed=rng.choice((6.0, 10.0, 24.0)), base_damage=caster.attack))
+    for _ in range(crowd):
+        x, y = rng.choice(game_map.walkable)
+        entity = Entity(10, 20, 5, (x * ts, y * ts), ts, store=store)
+        entity.team_id = "enemy"
+        entities.append(entity)
+    return entities, shots
+
+
+def bench_projectiles(args):
+    """Per-projectile sweeps versus the batched ProjectileSystem: same hits and positions, cost."""
+    frames = 60
+    mismatches = 0
+    for key, game_map in load_stage_maps().items():
+        for count, crowd in ((10, 0), (100, 0), (1000, 0), (10, 5000), (1000, 5000)):
+            # Same world twice; the hit messages are muted so they do not swamp the timing
+            entities, shots = projectile_world(game_map, count, args.seed, crowd)
+            grid = SpatialHash()
+            for entity in entities:
+                grid.insert(entity)
+            live = list(shots)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(frames):
+                    for shot in live:
+                        shot.update(game_map, entities, grid)
+                    live = [shot for shot in live if shot.active]
+            scalar_time = time.perf_counter() - start
+
+            batch_entities, batch_shots = projectile_world(game_map, count, args.seed, crowd)
+            batch_grid = SpatialHash()
+            for entity in batch_entities:
+                batch_grid.insert(entity)
+            system = ProjectileSystem()
+            for shot in batch_shots:
+                system.append(shot)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(frames):
+                    system.update(game_map, spatial_hash=batch_grid)
+            batch_time = time.perf_counter() - start
+
+            for a, b in zip(shots, batch_shots):
+                if (a.active, a.impact_time, tuple(a.position)) != (b.active, b.impact_time, tuple(map(float, b.position))):
+                    mismatches += 1
+                    print(f"  shot mismatch: {a.active} {a.impact_time} {tuple(a.position)} "
+                          f"vs {b.active} {b.impact_time} {tuple(b.position)}")
+            mismatches += sum((a.health, a.state) != (b.health, b.state) for a, b in zip(entities, batch_entities))
+
+            hits = sum(1 for shot in shots if not shot.active)
+            print(f"{key}: {count:>5} projectiles x {frames} frames, {len(entities):>5} entities, {hits} hit: "
+                  f"per-projectile {scalar_time * 1000:8.1f} ms  batched {batch_time * 1000:7.1f} ms  "
+                  f"(x{scalar_time / max(batch_time, 1e-9):.1f})")
+
+    print("projectiles identical" if not mismatches else f"{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+def bench_activation(args):
+    """Which enemies update each frame: distance to every enemy versus the activation index."""
+    mismatches = 0
+    ts = Config.TILE_SIZE
+    reach = Config.DETECTION_DISTANCE
+    for key, game_map in load_stage_maps().items():
+        for count in (100, 1000, 5000):
+            rng = random.Random(args.seed)
+            enemies = []
+            index = SpatialHash(cell_size=reach)
+            store = EntityStore()
+            for _ in range(count):
+                x, y = rng.choice(game_map.walkable)
+                enemy = Entity(40, 10, 5, (x * ts, y * ts), ts, store=store)
+                index.insert(enemy)
+                enemies.append(enemy)
+            x, y = rng.choice(game_map.walkable)
+            px, py = x * ts, y * ts
+
+            scan_time = index_time = 0.0
+            awake = 0
+            for _ in range(args.queries):
+                # The player wanders; awake enemies step towards it
+                px += rng.uniform(-48, 48)
+                py += rng.uniform(-48, 48)
+                start = time.perf_counter()
+                expected = [e for e in enemies if ((e.center[0] - px) ** 2 + (e.center[1] - py) ** 2) ** 0.5 <= reach]
+                scan_time += time.perf_counter() - start
+                start = time.perf_counter()
+                actual = [e for e in index.candidates(px - reach, py - reach, px + reach, py + reach)
+                          if ((e.center[0] - px) ** 2 + (e.center[1] - py) ** 2) ** 0.5 <= reach]
+                index_time += time.perf_counter() - start
+                mismatches += set(expected) != set(actual)
+                awake += len(actual)
+                for enemy in actual:
+                    enemy.move((rng.choice((-1, 0, 1)), rng.choice((-1, 0, 1))))
+                    index.move(enemy)
+
+            print(f"{key}: {count:>5} enemies, {args.queries} frames, {awake / args.queries:5.1f} awake: "
+                  f"scan {scan_time * 1000:8.1f} ms  index {index_time * 1000:7.1f} ms "
+                  f"(x{scan_time / max(index_time, 1e-9):.1f})")
+
+    print("activation identical" if not mismatches else f"{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+def instance_bytes(make, count):
+    """Average bytes allocated per object, including anything it owns, over count live objects."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [make(i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    total -= sys.getsizeof(kept)  # the list holding them
+    return total / count
+
+
+def bench_memory(args):
+    """Per-instance bytes of the runtime objects, and attribute-heavy update throughput."""
+    count = 20000
+    rng = random.Random(args.seed)
+    game_map = next(iter(load_stage_maps().values()))
+    ts = Config.TILE_SIZE
+    walkable = [((x + 0.5) * ts, (y + 0.5) * ts) for x, y in game_map.walkable]
+    store = EntityStore()
+    caster = Entity(40, 10, 5, walkable[0], ts, store=store)
+
+    def entity(i):
+        return Entity(40, 10, 5, walkable[i % len(walkable)], ts, store=store)
+
+    def projectile(i):
+        return Projectile(caster, walkable[i % len(walkable)], (1.0, 0.0))
+
+    sizes = {
+        "Entity": instance_bytes(entity, count),
+        "Projectile": instance_bytes(projectile, count),
+        "AOEAttack": instance_bytes(lambda i: AOEAttack(caster, walkable[i % len(walkable)]), count),
+        "Buff": instance_bytes(lambda i: Buff(caster, "speed", 2.0, 5.0), count),
+        "Chest": instance_bytes(lambda i: Chest((i * ts, 0), "aoe"), count),
+    }
+    for name, size in sizes.items():
+        print(f"{name:<11} {size:7.0f} bytes per instance")
+
+    # A frame's worth of entity bookkeeping: buffs, cast/invincibility timers, a step and its stats
+    entities = [entity(i) for i in range(1000)]
+    for e in entities:
+        Buff(e, "speed", 1.0, 60.0).apply()
+    start = time.perf_counter()
+    total = 0.0
+    for _ in range(args.queries // 10):
+        for e in entities:
+            e.update()
+            e.move((rng.choice((-1, 0, 1)), rng.choice((-1, 0, 1))))
+            total += e.health + e.attack + e.defense + e.speed + e.center[0]
+    entity_time = time.perf_counter() - start
+    entity_rate = len(entities) * (args.queries // 10) / entity_time
+
+    shots = [projectile(i) for i in range(1000)]
+    shot_time = 0.0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.queries // 10):
+            # Fired again each round, so walls hit in earlier rounds do not leave idle shots
+            for i, shot in enumerate(shots):
+                shot.position = walkable[i % len(walkable)]
+                shot.active = True
+            start = time.perf_counter()
+            for shot in shots:
+                shot.update(game_map, ())
+            shot_time += time.perf_counter() - start
+    shot_rate = len(shots) * (args.queries // 10) / shot_time
+
+    print(f"entity update + move: {entity_rate / 1000:8.1f} k/s")
+    print(f"projectile update:    {shot_rate / 1000:8.1f} k/s")
+    return 0
+
+
+def ecs_world(count, seed, now):
+    """count entities in their own store, a tenth of them casting and some shielded."""
+    rng = random.Random(seed)
+    store = EntityStore()
+    entities = []
+    for i in range(count):
+        entity = Entity(40, 10, 5, (rng.uniform(0, 4000), rng.uniform(0, 4000)), Config.TILE_SIZE, store=store)
+        entity.team_id = "player" if i % 10 == 0 else "enemy"
+        if rng.random() < 0.1:
+            entity.start_cast(rng.choice((0.0, 60.0)))
+            entity.cast_start_time = now - 1
+        if rng.random() < 0.3:
+            entity.invincible = True
+            entity.invincible_start = now - rng.choice((0.0, 1.0))
+        entity.aoe_last_used = now - rng.uniform(0, 10)
+        entities.append(entity)
+    return store, entities
+
+
+def moving_world(game_map, count, seed, frames=30):
+    """count entities on a stage's floor, some overlapping walls, with per-frame headings:
+    path-like unit vectors, 8-way steps and standing still, a few with a speed buff."""
+    rng = random.Random(seed)
+    ts = Config.TILE_SIZE
+    store = EntityStore()
+    entities = []
+    for _ in range(count):
+        tx, ty = rng.choice(game_map.walkable)
+        spawn = (tx * ts + rng.choice((0.0, rng.uniform(-ts / 2, ts / 2))), ty * ts + rng.choice((0.0, rng.uniform(-ts / 2, ts / 2))))
+        entity = Entity(40, 10, 5, spawn, rng.choice((ts, ts - 8)), store=store)
+        entity.speed = rng.choice((3.0, 4.0))
+        entity.map = game_map
+        if rng.random() < 0.1:
+            entity.speed_buff = Buff(entity, "speed", 1.0, 3600)
+        entities.append(entity)
+
+    def heading():
+        kind = rng.random()
+        if kind < 0.5:
+            angle = rng.uniform(0, 2 * math.pi)
+            return math.cos(angle), math.sin(angle)
+        if kind < 0.9:
+            return rng.choice((-1, 0, 1)), rng.choice((-1, 0, 1))
+        return 0, 0
+
+    return store, entities, [[heading() for _ in entities] for _ in range(frames)]
+
+
+def bench_ecs(args):
+    """Per-object entity updates versus the EntityStore systems over the same rows."""
+    mismatches = 0
+    attacker = Entity(40, 10, 5, (0, 0), Config.TILE_SIZE, store=EntityStore())
+    for count in (100, 1000, 10000):
+        timings = {}
+        results = []
+        now = time.time()
+        for columnar in (False, True):
+            store, entities = ecs_world(count, args.seed, now)
+            ids = store.ids(entities)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                if columnar:
+                    for eid in store.tick(ids, now).tolist():
+                        store.owners[eid].finish_cast()
+                    take_damage_many(entities, 30.0, attacker)
+                    rects = TargetPack(entities).rects()
+                else:
+                    for entity in entities:
+                        entity.update()
+                    for entity in entities:
+                        entity.take_damage(30.0, attacker)
+                    rects = pack_rects(entities)
+            timings[columnar] = time.perf_counter() - start
+            results.append(([r.tolist() for r in rects], [(e.health, e.state, e.invincible) for e in entities]))
+        mismatches += results[0] != results[1]
+        print(f"{count:>6} entities, one frame of timers, damage and target rects: "
+              f"per-object {timings[False] * 1000:8.2f} ms  columns {timings[True] * 1000:7.2f} ms "
+              f"(x{timings[False] / max(timings[True], 1e-9):.1f})")
+
+    # Movement: Entity.move one by one against steer + the store's pass, on a real stage with walls
+    game_map = next(iter(load_stage_maps().values()))
+    for count in (100, 1000, 10000):
+        timings = {}
+        results = []
+        for columnar in (False, True):
+            store, entities, headings = moving_world(game_map, count, args.seed)
+            start = time.perf_counter()
+            for frame in headings:
+                if columnar:
+                    for entity, direction in zip(entities, frame):
+                        entity.steer(direction)
+                    for eid in store.move(game_map).tolist():
+                        store.owners[eid].update_center()
+                else:
+                    for entity, direction in zip(entities, frame):
+                        entity.move(direction)
+            timings[columnar] = time.perf_counter() - start
+            results.append([(e.position, e.center, e.state) for e in entities])
+        mismatches += results[0] != results[1]
+        print(f"{count:>6} entities, {len(headings)} frames of walking into walls: "
+              f"per-object {timings[False] * 1000:8.2f} ms  columns {timings[True] * 1000:7.2f} ms "
+              f"(x{timings[False] / max(timings[True], 1e-9):.1f})")
+
+    print("ecs systems identical" if not mismatches else f"{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+def churn_session(game_map, frames, pooled, seed):
+    """A long fight's worth of shots and AOEs, allocated fresh or drawn from pools."""
+    rng = random.Random(seed)
+    ts = Config.TILE_SIZE
+    walkable = [((x + 0.5) * ts, (y + 0.5) * ts) for x, y in game_map.walkable]
+    caster = Entity(40, 10, 5, walkable[0], ts, store=EntityStore())
+    projectiles = ObjectPool(Projectile) if pooled else None
+    aoes = ObjectPool(AOEAttack) if pooled else None
+    system = ProjectileSystem(pool=projectiles)
+    active_aoes = []
+    for _ in range(frames):
+        for _ in range(20):
+            angle = rng.uniform(0, 2 * math.pi)
+            args = (caster, rng.choice(walkable), (math.cos(angle), math.sin(angle)))
+            system.append(projectiles.acquire(*args) if pooled else Projectile(*args))
+        for _ in range(2):
+            aoe = aoes.acquire(caster, rng.choice(walkable)) if pooled else AOEAttack(caster, rng.choice(walkable))
+            aoe.applied = True  # as if its cast had already dealt the damage
+            active_aoes.append(aoe)
+        system.update(game_map, ())
+
+        # Expire after 60 frames, compacting in place like GameManager.release_aoes
+        kept = 0
+        for aoe in active_aoes:
+            aoe.lifetime -= 1 / 60
+            if aoe.lifetime > 0:
+                active_aoes[kept] = aoe
+                kept += 1
+            elif pooled:
+                aoes.release(aoe)
+        del active_aoes[kept:]
+    return projectiles, aoes
+
+
+def settle_casts(game_map, casts, seed):
+    """AOE casts that land, whose caster dies mid-cast, or that are still casting at a stage unload,
+    each retired before or after its cast ends; returns aoe_pool's in_use drift and any double releases."""
+    rng = random.Random(seed)
+    ts = Config.TILE_SIZE
+    walkable = [((x + 0.5) * ts, (y + 0.5) * ts) for x, y in game_map.walkable]
+    store = EntityStore()
+    before = aoe_pool.in_use
+    unloaded = []
+    for i in range(casts):
+        caster = Entity(40, 10, 5, rng.choice(walkable), ts, store=store)
+        aoe = caster.use_aoe([], rng.choice(walkable))
+        outcome = i % 3
+        if outcome == 2:
+            unloaded.append(aoe)
+            continue
+        steps = ["retire", "land" if outcome == 0 else "die"]
+        rng.shuffle(steps)
+        for step in steps:
+            if step == "retire":
+                aoe.retire()
+            elif step == "land":
+                caster.cast_start_time -= caster.cast_duration
+                caster.update()
+            else:
+                caster.die()
+    for aoe in unloaded:  # as GameManager.release_aoes(expired_only=False)
+        aoe.cancel()
+        aoe.retire()
+    return aoe_pool.in_use - before, len(aoe_pool.free) - len({id(aoe) for aoe in aoe_pool.free})
+
+
+def bench_pools(args):
+    """Projectile/AOE churn over a long session: fresh objects versus pooled ones."""
+    game_map = next(iter(load_stage_maps().values()))
+    frames = max(args.queries, 100)
+    collections = []
+    gc.callbacks.append(lambda phase, info: phase == "start" and collections.append(info["generation"]))
+    for pooled in (False, True):
+        collections.clear()
+        gc.collect()
+        collections.clear()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            projectiles, aoes = churn_session(game_map, frames, pooled, args.seed)
+        elapsed = time.perf_counter() - start
+        print(f"{'pooled' if pooled else 'fresh':>6}: {frames} frames {elapsed * 1000:8.1f} ms, "
+              f"gc runs {len(collections)} (gen2 {collections.count(2)})")
+        if pooled:
+            for name, pool in (("projectile", projectiles), ("aoe", aoes)):
+                stats = pool.stats()
+                print(f"        {name:<10} hits {stats['hits']:>6}  misses {stats['misses']:>4}  "
+                      f"high water {stats['high_water']:>4}  free {stats['free']:>4}")
+    gc.callbacks.pop()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        drift, doubled = settle_casts(game_map, 300, args.seed)
+    print(f"  casts: aoe in_use drift {drift}, double releases {doubled}")
+    return 0 if drift == 0 and doubled == 0 else 1
+
+
+def maze_layout(cells, rng):
+    """Perfect maze (recursive backtracker) of cells x cells rooms, as a tile-code array."""
+    size = 2 * cells + 1
+    codes = np.full((size, size), ord(Map.WALL), dtype=np.uint8)
+    stack, visited = [(0, 0)], {(0, 0)}
+    codes[1, 1] = ord(Map.FLOOR)
+    while stack:
+        cx, cy = stack[-1]
+        options = [(cx + dx, cy + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                   if 0 <= cx + dx < cells and 0 <= cy + dy < cells and (cx + dx, cy + dy) not in visited]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny = rng.choice(options)
+        codes[cy + ny + 1, cx + nx + 1] = ord(Map.FLOOR)  # knock down the wall between
+        codes[2 * ny + 1, 2 * nx + 1] = ord(Map.FLOOR)
+        visited.add((nx, ny))
+        stack.append((nx, ny))
+    return codes
+
+
+def open_field_layout(size, rng, density=0.15):
+    """Open floor scattered with rectangular pillars."""
+    codes = np.full((size, size), ord(Map.FLOOR), dtype=np.uint8)
+    codes[[0, -1], :] = codes[:, [0, -1]] = ord(Map.WALL)
+    for _ in range(int(size * size * density / 6)):
+        w, h = rng.randint(1, 3), rng.randint(1, 3)
+        x, y = rng.randrange(1, size - w), rng.randrange(1, size - h)
+        codes[y:y + h, x:x + w] = ord(Map.WALL)
+    return codes
+
+
+def seal_pocket(codes):
+    # A walled 3x3 room in the bottom-right corner, so every map has a second region
+    size = codes.shape[0]
+    codes[size - 6:size - 1, size - 6:size - 1] = ord(Map.WALL)
+    codes[size - 5:size - 2, size - 5:size - 2] = ord(Map.FLOOR)
+    return codes
+
+
+def synthetic_map(codes, folder, name):
+    # Written as a 1px-per-tile layout image so it loads through the real Map
+    colors = {tile: color for color, tile in Map.TILE_COLORS.items()}
+    rgb = np.zeros(codes.shape + (3,), dtype=np.uint8)
+    for tile in (Map.WALL, Map.FLOOR):
+        color = colors[tile]
+        rgb[codes == ord(tile)] = ((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF)
+    path = os.path.join(folder, name + ".png")
+    Image.fromarray(rgb).save(path)
+    return Map(path, 1)
+
+
+def suite_queries(game_map, count, seed, unreachable=0.1):
+    """Seeded batch: mostly reachable pairs, plus goals in walls and in other regions."""
+    rng = random.Random(seed)
+    walls = [(x, y) for y in range(game_map.rows) for x in range(game_map.cols) if not game_map.is_walkable(x, y)]
+    queries = []
+    for _ in range(count):
+        start = rng.choice(game_map.walkable)
+        goal = rng.choice(game_map.walkable)
+        if rng.random() < unreachable:
+            others = [t for t in game_map.walkable if not game_map.same_region(start, t)]
+            goal = rng.choice(others) if others and rng.random() < 0.5 else rng.choice(walls)
+        queries.append((start, goal))
+    return queries
+
+
+def measure_batch(pathfinder, queries, memory_sample):
+    latencies, expanded, found = [], [], 0
+    for start, goal in queries:
+        t0 = time.perf_counter()
+        path = pathfinder.find_path(start, goal)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        expanded.append(pathfinder.last_expanded)
+        found += bool(path)
+
+    # Memory in a separate pass: tracemalloc slows everything it watches
+    tracemalloc.start()
+    for start, goal in queries[:memory_sample]:
+        pathfinder.find_path(start, goal)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "queries": len(queries),
+        "found": found,
+        "p50_ms": round(percentile(latencies, 50), 4),
+        "p99_ms": round(percentile(latencies, 99), 4),
+        "mean_ms": round(sum(latencies) / len(latencies), 4),
+        "total_ms": round(sum(latencies), 2),
+        "expanded_mean": round(sum(expanded) / len(expanded), 1),
+        "expanded_p99": percentile(expanded, 99),
+        "peak_search_kib": round(peak / 1024, 1),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_suite(args):
+    """Seeded find_path batches over the shipped stages, mazes and open fields; saves JSON."""
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        rng = random.Random(args.seed)
+        maps = list(load_stage_maps().items())
+        for cells in (16, 32, 64):
+            maps.append((f"maze {2 * cells + 1}", synthetic_map(seal_pocket(maze_layout(cells, rng)), folder, f"maze{cells}")))
+        for size in (64, 128, 256):
+            maps.append((f"open {size}", synthetic_map(seal_pocket(open_field_layout(size, rng)), folder, f"open{size}")))
+
+        for key, game_map in maps:
+            queries = suite_queries(game_map, args.queries, args.seed)
+            for mode, jump_points in (("astar", False), ("jps", True)):
+                # Cache off: every query is a real search
+                t0 = time.perf_counter()
+                pathfinder = AStarPathfinder(game_map, jump_points=jump_points, cache_size=0)
+                setup_ms = (time.perf_counter() - t0) * 1000
+                row = {"map": key, "mode": mode, "cols": game_map.cols, "rows": game_map.rows,
+                       "regions": game_map.region_count, "setup_ms": round(setup_ms, 2)}
+                row.update(measure_batch(pathfinder, queries, memory_sample=min(50, len(queries))))
+                results.append(row)
+                print(f"{key:<10} {mode:<5} p50 {row['p50_ms']:8.3f} ms  p99 {row['p99_ms']:8.3f} ms  "
+                      f"expanded {row['expanded_mean']:8.1f}  peak {row['peak_search_kib']:8.1f} KiB  "
+                      f"({row['found']}/{row['queries']} found)")
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "queries_per_map": args.queries,
+        "results": results,
+    }
+    output = args.output or os.path.join("data", "benchmarks", time.strftime("pathfinding-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"saved {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            before = {(r["map"], r["mode"]): r for r in json.load(f)["results"]}
+        print(f"against {args.baseline}:")
+        for row in results:
+            old = before.get((row["map"], row["mode"]))
+            if old:
+                print(f"  {row['map']:<10} {row['mode']:<5} p50 x{old['p50_ms'] / max(row['p50_ms'], 1e-9):.2f}  "
+                      f"p99 x{old['p99_ms'] / max(row['p99_ms'], 1e-9):.2f}")
+    return 0
+
+
+BENCHMARKS = {
+    "astar": bench_astar,
+    "jps": bench_jps,
+    "hpa": bench_hpa,
+    "cache": bench_cache,
+    "workers": bench_workers,
+    "los": bench_los,
+    "colliders": bench_colliders,
+    "visibility": bench_visibility,
+    "replan": bench_replan,
+    "suite": bench_suite,
+    "hits": bench_hits,
+    "sweep": bench_sweep,
+    "projectiles": bench_projectiles,
+    "aoe": bench_aoe,
+    "activation": bench_activation,
+    "memory": bench_memory,
+    "ecs": bench_ecs,
+    "pools": bench_pools,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output", help="suite: JSON file to write (default data/benchmarks/...)")
+    parser.add_argument("--baseline", help="suite: earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+    return BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,21 @@ class Config:
 
     # ENEMY
     RANGED_RING_RADIUS = 4
+    PATHFINDING_MODE = "flow_field"  # "flow_field" or "astar"
+    USE_JUMP_POINT_SEARCH = False  # flat-array A* now outruns Python JPS on our stages
+    USE_HIERARCHICAL_PATHFINDING = True  # long A* requests go through HPA* clusters
+    HPA_CLUSTER_SIZE = 10  # tiles per cluster side
+    PATH_CACHE_SIZE = 128  # recent (start, goal) searches kept by AStarPathfinder
+    PATH_BUDGET_NODES = 1500  # search nodes GameManager may expand per frame
+    PATH_BUDGET_MS = 2.0  # and wall-clock cap for the same work
+    USE_INCREMENTAL_REPLANNING = True  # queued searches reuse each enemy's previous search tree (ignored with PATH_WORKERS)
+    PATH_WORKERS = 0  # > 0 runs enemy searches in that many worker processes
+    FLOW_FIELD_MAX_COST = 10 * 48  # ~48 straight tiles from the player
+
+    # MAP
+    MAP_CACHE_DIR = "data/map_cache"
+    MERGE_WALL_COLLIDERS = True  # combine adjacent wall tiles into larger colliders
+    USE_VISIBILITY_TABLE = False  # ring picks read a table baked by `benchmark.py visibility` (tile centre to tile centre)
     MAP_LAYOUT = {
         "stage 1": "assets/maps/abyss_map_layout_1.png"
     }
@@ -0,0 +1,213 @@
+import time
+import numpy as np
+
+
+class Column:
+    """Entity attribute kept in the entity's row of an EntityStore column."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, entity, owner=None):
+        if entity is None:
+            return self
+        return entity.store.columns[self.name].item(entity.eid)
+
+    def __set__(self, entity, value):
+        entity.store.columns[self.name][entity.eid] = value
+
+
+class CodeColumn(Column):
+    """Column of small ints standing for strings (states, teams), read and written as the strings."""
+
+    __slots__ = ()
+
+    def __get__(self, entity, owner=None):
+        if entity is None:
+            return self
+        store = entity.store
+        return store.names[self.name][store.columns[self.name].item(entity.eid)]
+
+    def __set__(self, entity, value):
+        entity.store.columns[self.name][entity.eid] = entity.store.code(self.name, value)
+
+
+class EntityStore:
+    """Dense component arrays indexed by entity id, and the systems that run over them.
+
+    Entity objects are facades over one row each. Rows live as long as the store; a stage
+    builds a new store, so dead entities keep answering until the stage is left.
+    """
+
+    FLOAT_COLUMNS = ("x", "y", "health", "max_health", "attack", "defense", "speed",
+                     "cast_start_time", "cast_duration", "invincible_start", "invincible_duration",
+                     "aoe_last_used", "aoe_cooldown", "projectile_last_used", "projectile_cooldown",
+                     "buff_last_used", "buff_cooldown")
+    INT_COLUMNS = ("size",)
+    BOOL_COLUMNS = ("invincible",)
+    CODE_COLUMNS = ("state", "team")
+
+    # Fixed codes so systems can compare states without a lookup
+    IDLE, MOVING, CASTING, DEAD = range(4)
+    STATES = ("idle", "moving", "casting", "dead")
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.count = 0
+        self.owners = []  # id -> Entity
+        self.columns = {}
+        for names, dtype in ((self.FLOAT_COLUMNS, np.float64), (self.INT_COLUMNS, np.int64),
+                             (self.BOOL_COLUMNS, bool), (self.CODE_COLUMNS, np.int16)):
+            for name in names:
+                self.columns[name] = np.zeros(capacity, dtype=dtype)
+        self.names = {"state": list(self.STATES), "team": []}
+        self.codes = {"state": {name: i for i, name in enumerate(self.STATES)}, "team": {}}
+        # Headings recorded by Entity.steer this frame, consumed by move()
+        self.steered = []
+        self.headings = []
+
+    def __len__(self):
+        return self.count
+
+    def __getattr__(self, name):
+        # Columns read as attributes: store.health, store.x, ...
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def code(self, column, name):
+        codes = self.codes[column]
+        if name not in codes:
+            codes[name] = len(self.names[column])
+            self.names[column].append(name)
+        return codes[name]
+
+    def add(self, entity):
+        if self.count == self.capacity:
+            self.capacity *= 2
+            for name, old in self.columns.items():
+                new = np.zeros(self.capacity, dtype=old.dtype)
+                new[:self.count] = old[:self.count]
+                self.columns[name] = new
+        self.owners.append(entity)
+        self.count += 1
+        return self.count - 1
+
+    def ids(self, entities):
+        return np.fromiter((entity.eid for entity in entities), dtype=np.int64, count=len(entities))
+
+    # Systems. Each works on the rows it is given (or that steered) only, so sleeping
+    # entities are left alone exactly as when their update() is not called. GameManager ticks
+    # and moves awake enemies, AOEs damage through take_damage_many, and TargetPack reads rects.
+
+    def tick(self, ids, now):
+        """Cast and invincibility timers. Returns the ids whose cast just finished, in the order
+        given; their owners still have to run the pending action."""
+        state = self.columns["state"]
+        casting = ids[state[ids] == self.CASTING]
+        finished = casting[now - self.columns["cast_start_time"][casting] >= self.columns["cast_duration"][casting]]
+        state[finished] = self.IDLE
+
+        shielded = ids[self.columns["invincible"][ids]]
+        expired = shielded[now - self.columns["invincible_start"][shielded]
+                           >= self.columns["invincible_duration"][shielded]]
+        self.columns["invincible"][expired] = False
+        return finished
+
+    def steer(self, eid, dx, dy, boost):
+        self.steered.append(eid)
+        self.headings.append((dx, dy, boost))
+
+    def move(self, game_map):
+        """Steps every row that steered this frame by its heading at speed + boost, sliding along
+        walls like Map.resolve_move; returns the moved ids in steering order.
+
+        An axis step whose swept box overlaps no wall tile cannot be pushed back, so those are
+        done for all rows at once against walkable_bits; only boxes that reach into a wall go
+        through resolve_move, one at a time.
+        """
+        ids = np.array(self.steered, dtype=np.int64)
+        headings = np.array(self.headings, dtype=np.float64).reshape(-1, 3)
+        self.steered, self.headings = [], []
+        if not len(ids):
+            return ids
+
+        speed = self.columns["speed"][ids] + headings[:, 2]
+        step_x = headings[:, 0] * speed
+        step_y = headings[:, 1] * speed
+        x = self.columns["x"][ids]
+        y = self.columns["y"][ids]
+        size = self.columns["size"][ids]
+
+        moved = x + step_x
+        blocked = (step_x != 0) & self._touches_wall(game_map, np.minimum(x, moved), y,
+                                                     np.maximum(x, moved) + size, y + size)
+        x = np.where(step_x != 0, moved, x)
+        for i in np.flatnonzero(blocked).tolist():
+            w = size.item(i)
+            x[i] = game_map.resolve_move(self.columns["x"].item(ids[i]), y.item(i), w, w, step_x.item(i), 0)[0]
+
+        moved = y + step_y
+        blocked = (step_y != 0) & self._touches_wall(game_map, x, np.minimum(y, moved),
+                                                     x + size, np.maximum(y, moved) + size)
+        y = np.where(step_y != 0, moved, y)
+        for i in np.flatnonzero(blocked).tolist():
+            w = size.item(i)
+            y[i] = game_map.resolve_move(x.item(i), self.columns["y"].item(ids[i]), w, w, 0, step_y.item(i))[1]
+
+        self.columns["x"][ids] = x
+        self.columns["y"][ids] = y
+        return ids
+
+    @staticmethod
+    def _touches_wall(game_map, left, top, right, bottom):
+        # Wall tiles strictly overlapping each box, the test resolve_move filters its tiles by;
+        # boxes span a tile or two, so this loops over the few offsets, not the rows
+        ts = game_map.tile_size
+        x0 = np.maximum(left // ts, 0).astype(np.int64)
+        y0 = np.maximum(top // ts, 0).astype(np.int64)
+        x1 = np.minimum(-(-right // ts) - 1, game_map.cols - 1).astype(np.int64)
+        y1 = np.minimum(-(-bottom // ts) - 1, game_map.rows - 1).astype(np.int64)
+        bits = np.frombuffer(game_map.walkable_bits, dtype=np.uint8)
+        touches = np.zeros(len(left), dtype=bool)
+        for dy in range(max(int((y1 - y0).max(initial=-1)) + 1, 0)):
+            for dx in range(max(int((x1 - x0).max(initial=-1)) + 1, 0)):
+                inside = (x0 + dx <= x1) & (y0 + dy <= y1)
+                i = np.where(inside, (y0 + dy) * game_map.cols + x0 + dx, 0)
+                touches |= inside & ((bits[i >> 3] >> (i & 7)) & 1 == 0)
+        return touches
+
+    def damage(self, ids, dmg, flat, now):
+        """Mitigated damage to every id that is not dead or invincible; returns the ids hit."""
+        hit = ids[~self.columns["invincible"][ids] & (self.columns["state"][ids] != self.DEAD)]
+        self.columns["health"][hit] -= dmg * (dmg / (self.columns["defense"][hit] + dmg)) + flat
+        self.columns["invincible"][hit] = True
+        self.columns["invincible_start"][hit] = now
+        return hit
+
+    def rects(self, ids):
+        """left, top, right, bottom of the entities' rects, truncated like pygame.Rect."""
+        left = np.trunc(self.columns["x"][ids])
+        top = np.trunc(self.columns["y"][ids])
+        size = self.columns["size"][ids]
+        return left, top, left + size, top + size
+
+
+def take_damage_many(targets, dmg, attacker):
+    """Entity.take_damage for each target, the mitigation done column-wise when they share a store."""
+    if not targets:
+        return
+    store = targets[0].store
+    if any(target.store is not store for target in targets):
+        for target in targets:
+            target.take_damage(dmg, attacker)
+        return
+
+    hit = store.damage(store.ids(targets), dmg, attacker.flat_bonus(), time.time())
+    for eid in hit.tolist():
+        target = store.owners[eid]
+        target.on_damaged(dmg)
+        target.after_hit()
@@ -0,0 +1,36 @@
+class ObjectPool:
+    """Free list of spent instances of one class, handed out again instead of allocating.
+
+    The class needs a reset() taking the constructor's arguments; acquire() calls it on a
+    reused instance, so callers see a fresh object either way.
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.in_use = 0
+        self.hits = 0  # acquires served from the free list
+        self.misses = 0  # acquires that had to construct
+        self.high_water = 0  # most instances out at once
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args, **kwargs)
+            self.hits += 1
+        else:
+            obj = self.cls(*args, **kwargs)
+            self.misses += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return obj
+
+    def release(self, obj):
+        # Released objects keep their last state until reused, so late readers still see it
+        self.free.append(obj)
+        self.in_use -= 1
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "high_water": self.high_water,
+                "in_use": self.in_use, "free": len(self.free)}
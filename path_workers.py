@@ -0,0 +1,106 @@
+import concurrent.futures as futures
+from concurrent.futures.process import BrokenProcessPool
+from config import Config
+from pathfinder import AStarPathfinder, PathRequest
+
+
+class GridView:
+    """Read-only stand-in for Map inside worker processes: only the tile grid."""
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.change_listeners = []
+
+    def is_walkable(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows and self.grid[y][x] != "1"
+
+
+_worker_pathfinder = None
+
+
+def _init_worker(grid, jump_points):
+    # Runs once per worker when the pool starts, so the grid crosses the process boundary once per stage
+    global _worker_pathfinder
+    _worker_pathfinder = AStarPathfinder(GridView(grid), jump_points=jump_points)
+
+
+def _find_path(start, goal):
+    return _worker_pathfinder.find_path(start, goal)
+
+
+class PathWorkerPool:
+    """Same interface as PathRequestQueue, but searches run in worker processes."""
+
+    def __init__(self, pathfinder, workers=Config.PATH_WORKERS):
+        self.pathfinder = pathfinder
+        self.workers = workers
+        self.in_flight = {}  # PathRequest -> Future
+        self.by_owner = {}
+        self.executor = self._start_executor()
+        pathfinder.map.change_listeners.append(self.on_tile_changed)
+
+    def _start_executor(self):
+        return futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(list(self.pathfinder.grid), self.pathfinder.jump_points)
+        )
+
+    def on_tile_changed(self, x, y):
+        # Workers hold a snapshot of the grid: restart them and redo in-flight work on the new one
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = self._start_executor()
+        for request in list(self.in_flight):
+            self.in_flight[request] = self.executor.submit(_find_path, request.start, request.goal)
+
+    def request(self, owner, start, goal):
+        self.cancel(owner)
+
+        request = PathRequest(owner, start, goal)
+        cached = self.pathfinder.lookup(start, goal)
+        if cached is None and not self.pathfinder.can_reach(start, goal):
+            cached = []  # different regions: no search needed
+        if cached is not None:
+            request.path = cached
+            request.done = True
+            return request
+
+        try:
+            self.in_flight[request] = self.executor.submit(_find_path, start, goal)
+        except (BrokenProcessPool, RuntimeError):
+            self._finish(request, self.pathfinder.search(start, goal))  # synchronous fallback
+            return request
+        self.by_owner[owner] = request
+        return request
+
+    def cancel(self, owner):
+        request = self.by_owner.pop(owner, None)
+        if request is not None:
+            request.cancelled = True
+            future = self.in_flight.pop(request, None)
+            if future is not None:
+                future.cancel()
+
+    def run(self):
+        # Collect finished futures; enemies see request.done on their next update
+        for request, future in list(self.in_flight.items()):
+            if not future.done():
+                continue
+            del self.in_flight[request]
+            try:
+                path = future.result()
+            except BrokenProcessPool:
+                path = self.pathfinder.search(request.start, request.goal)
+            self._finish(request, path)
+
+    def _finish(self, request, path):
+        request.path = path
+        request.done = True
+        self.pathfinder.store(request.start, request.goal, path)
+        if self.by_owner.get(request.owner) is request:
+            del self.by_owner[request.owner]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
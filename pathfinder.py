@@ -1,16 +1,119 @@
 import heapq
+import time
+from collections import OrderedDict, deque
+import numpy as np
+from config import Config
+
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1),
+              (-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+class SearchBuffers:
+    """Per-cell g-scores and parents, reused across searches: a cell's entries count only when
+    its stamp matches the current generation, so nothing is cleared between searches."""
+
+    def __init__(self, size):
+        self.generation = 0
+        self.g = [0] * size
+        self.parent = [0] * size
+        self.seen = [0] * size  # generation in which g/parent were last written
+        self.closed = [0] * size  # generation in which the cell was expanded
 
 class AStarPathfinder:
-    def __init__(self, grid):
-        self.grid = grid
-        self.rows = len(grid)
-        self.cols = len(grid[0])
+    def __init__(self, game_map, jump_points=Config.USE_JUMP_POINT_SEARCH, cache_size=Config.PATH_CACHE_SIZE):
+        self.map = game_map
+        self.grid = game_map.grid
+        self.rows = game_map.rows
+        self.cols = game_map.cols
+        self.jump_points = jump_points
+        self.last_expanded = 0  # nodes popped by the most recent search
+
+        # LRU of recent results: (start, goal) -> (path tuple, {tile: index in path})
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_suffix_hits = 0
+        self.cache_misses = 0
+
+        # Flat-array core: node id = y * cols + x, one bit per allowed move in neighbor_mask
+        self.neighbor_mask = bytearray(self.rows * self.cols)
+        self._adjacency = [()] * (self.rows * self.cols)  # id -> ((neighbor id, cost), ...)
+        self._tile_adjacency = [()] * (self.rows * self.cols)  # id -> (((x, y), cost), ...)
+        self._free_buffers = []  # suspended searches each hold their own SearchBuffers
+        self._build_adjacency()
+        game_map.change_listeners.append(self.on_tile_changed)
 
     def is_walkable(self, x, y):
-        return (
-            0 <= x < self.cols and 0 <= y < self.rows
-            and self.grid[y][x] != "1"
-        )
+        return self.map.is_walkable(x, y)
+
+    def _build_adjacency(self):
+        rows, cols = self.rows, self.cols
+        walkable = np.zeros((rows + 2, cols + 2), dtype=bool)  # padded with walls
+        walkable[1:-1, 1:-1] = [[self.is_walkable(x, y) for x in range(cols)] for y in range(rows)]
+
+        def shifted(dx, dy):
+            return walkable[1 + dy:rows + 1 + dy, 1 + dx:cols + 1 + dx]
+
+        # Same rule as neighbors(): a diagonal needs both sides open as well
+        mask = np.zeros((rows, cols), dtype=np.uint8)
+        for bit, (dx, dy) in enumerate(DIRECTIONS):
+            allowed = shifted(dx, dy)
+            if dx and dy:
+                allowed = allowed & shifted(dx, 0) & shifted(0, dy)
+            mask |= allowed.astype(np.uint8) << bit
+        self.neighbor_mask[:] = mask.tobytes()
+        for node in range(rows * cols):
+            self._set_adjacency(node)
+
+    def _set_adjacency(self, node):
+        cols = self.cols
+        x, y = node % cols, node // cols
+        mask = self.neighbor_mask[node]
+        moves = [(dx, dy, 14 if dx and dy else 10)
+                 for bit, (dx, dy) in enumerate(DIRECTIONS) if mask >> bit & 1]
+        self._adjacency[node] = tuple((node + dy * cols + dx, cost) for dx, dy, cost in moves)
+        self._tile_adjacency[node] = tuple(((x + dx, y + dy), cost) for dx, dy, cost in moves)
+
+    def _refresh_adjacency(self, x, y):
+        # A cell's moves depend only on the 3x3 block around it
+        for ny in range(max(0, y - 1), min(self.rows, y + 2)):
+            for nx in range(max(0, x - 1), min(self.cols, x + 2)):
+                mask = 0
+                for bit, (dx, dy) in enumerate(DIRECTIONS):
+                    if self.is_walkable(nx + dx, ny + dy) and (
+                            not (dx and dy) or (self.is_walkable(nx + dx, ny) and self.is_walkable(nx, ny + dy))):
+                        mask |= 1 << bit
+                self.neighbor_mask[ny * self.cols + nx] = mask
+                self._set_adjacency(ny * self.cols + nx)
+
+    def neighbors(self, node):
+        x, y = node
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            return self._tile_adjacency[y * self.cols + x]
+        return self._neighbors_off_grid(node)
+
+    def _neighbors_off_grid(self, node):
+        x, y = node
+        for dx, dy in DIRECTIONS:
+            if not self.is_walkable(x + dx, y + dy):
+                continue
+
+            # ✋ Prevent diagonal clipping through corners
+            if dx != 0 and dy != 0:
+                if not self.is_walkable(x + dx, y) or not self.is_walkable(x, y + dy):
+                    continue  # One of the sides is blocked
+
+            yield (x + dx, y + dy), 14 if dx != 0 and dy != 0 else 10
+
+    def can_reach(self, start, goal):
+        """False only when goal certainly lies outside the region start can walk into."""
+        same_region = getattr(self.map, "same_region", None)
+        if same_region is None or start == goal or same_region(start, goal):
+            return True
+        if self.is_walkable(*start):
+            return False
+        # A start embedded in a wall can still step out into a neighbouring region
+        return any(same_region(neighbor, goal) for neighbor, _ in self.neighbors(start))
 
     def heuristic(self, a, b):
         # Octile distance (used in Unity)
@@ -18,43 +121,259 @@ class AStarPathfinder:
         return 14 * min(dx, dy) + 10 * abs(dx - dy)
 
     def find_path(self, start, goal):
+        path = self.lookup(start, goal)
+        if path is None:
+            path = self.search(start, goal)
+            self.store(start, goal, path)
+        return path
+
+    def lookup(self, start, goal):
+        """Cached path for (start, goal) as a fresh list, or None on a miss."""
+        if self.cache_size <= 0:
+            return None
+
+        key = (start, goal)
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            return list(entry[0])
+
+        # A start lying on a cached path to the same goal can reuse that path's tail
+        for (_, cached_goal), (path, index) in reversed(self.cache.items()):
+            if cached_goal == goal and start in index:
+                self.cache_suffix_hits += 1
+                return list(path[index[start]:])
+
+        self.cache_misses += 1
+        return None
+
+    def store(self, start, goal, path):
+        if self.cache_size <= 0:
+            return
+        self.cache[(start, goal)] = (tuple(path), {tile: i for i, tile in enumerate(path)})
+        self.cache.move_to_end((start, goal))
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def search(self, start, goal):
+        return self._drain(self.iter_search(start, goal))
+
+    def iter_search(self, start, goal):
+        """Resumable search: yields once per expanded node and returns the path."""
+        if self.jump_points:
+            return self._jps_steps(start, goal)
+        return self._astar_steps(start, goal)
+
+    @staticmethod
+    def _drain(steps):
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+
+    def invalidate_goal(self, goal):
+        for key in [k for k in self.cache if k[1] == goal]:
+            del self.cache[key]
+
+    def clear_cache(self):
+        self.cache.clear()
+
+    def on_tile_changed(self, x, y):
+        self._refresh_adjacency(x, y)
+
+        # Drop paths through the tile, plus failed searches that it might now open up
+        tile = (x, y)
+        self.invalidate_goal(tile)
+        for key in [k for k, (path, index) in self.cache.items() if not path or tile in index]:
+            del self.cache[key]
+
+    def cache_stats(self):
+        lookups = self.cache_hits + self.cache_suffix_hits + self.cache_misses
+        return {
+            "size": len(self.cache),
+            "capacity": self.cache_size,
+            "hits": self.cache_hits,
+            "suffix_hits": self.cache_suffix_hits,
+            "misses": self.cache_misses,
+            "hit_rate": (self.cache_hits + self.cache_suffix_hits) / lookups if lookups else 0.0,
+        }
+
+    def find_path_astar(self, start, goal):
+        return self._drain(self._astar_steps(start, goal))
+
+    def find_path_jps(self, start, goal):
+        return self._drain(self._jps_steps(start, goal))
+
+    def _astar_steps(self, start, goal):
+        cols, rows = self.cols, self.rows
+        self.last_expanded = 0
+        if start == goal:
+            self.last_expanded = 1
+            yield
+            return [start]
+        if not (0 <= start[0] < cols and 0 <= start[1] < rows and 0 <= goal[0] < cols and 0 <= goal[1] < rows):
+            return []  # an off-grid goal is never reached; enemies never start off-grid
+        if not self.can_reach(start, goal):
+            return []  # sealed-off goal: skip flooding the whole region
+
+        buffers = self._free_buffers.pop() if self._free_buffers else SearchBuffers(rows * cols)
+        try:
+            buffers.generation += 1
+            gen = buffers.generation
+            g_score, parent, seen, closed = buffers.g, buffers.parent, buffers.seen, buffers.closed
+            adjacency = self._adjacency
+            gx, gy = goal
+            start_id, goal_id = start[1] * cols + start[0], gy * cols + gx
+
+            # Heap entries (f, h, x, y, id): ties break on (x, y) exactly like the tuple nodes did
+            g_score[start_id] = 0
+            seen[start_id] = gen
+            open_set = [(0, 0, start[0], start[1], start_id)]
+            while open_set:
+                _, _, _, _, current = heapq.heappop(open_set)
+                if closed[current] == gen:
+                    continue
+                closed[current] = gen
+                self.last_expanded += 1
+                yield
+
+                if current == goal_id:
+                    path = [current]
+                    while current != start_id:
+                        current = parent[current]
+                        path.append(current)
+                    path.reverse()
+                    return [(node % cols, node // cols) for node in path]
+
+                base_g = g_score[current]
+                for neighbor, move_cost in adjacency[current]:
+                    tentative_g = base_g + move_cost
+                    if seen[neighbor] != gen or tentative_g < g_score[neighbor]:
+                        seen[neighbor] = gen
+                        g_score[neighbor] = tentative_g
+                        parent[neighbor] = current
+                        nx, ny = neighbor % cols, neighbor // cols
+                        dx, dy = abs(nx - gx), abs(ny - gy)
+                        h = 10 * (dx + dy) - 6 * (dx if dx < dy else dy)  # octile, as heuristic()
+                        heapq.heappush(open_set, (tentative_g + h, h, nx, ny, neighbor))
+            return []
+        finally:
+            self._free_buffers.append(buffers)
+
+    def _jps_steps(self, start, goal):
+        # Jump Point Search: same moves and costs as A*, but only jump points enter the heap
         open_set = []
-        heapq.heappush(open_set, (0, 0, start))  # (fScore, hScore, node)
+        heapq.heappush(open_set, (0, 0, start))
         came_from = {}
         g_score = {start: 0}
-        f_score = {start: self.heuristic(start, goal)}
-
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1),
-                      (-1, -1), (-1, 1), (1, -1), (1, 1)]
+        closed = set()
+        self.last_expanded = 0
+        if not self.can_reach(start, goal):
+            return []
 
         while open_set:
             _, _, current = heapq.heappop(open_set)
+            if current in closed:
+                continue
+            closed.add(current)
+            self.last_expanded += 1
+            yield
 
             if current == goal:
-                return self.reconstruct_path(came_from, current)
-
-            for dx, dy in directions:
-                neighbor = (current[0] + dx, current[1] + dy)
+                return self._expand_jump_path(self.reconstruct_path(came_from, current))
 
-                if not self.is_walkable(*neighbor):
+            for dx, dy in self._pruned_directions(current, came_from.get(current)):
+                jump_point = self._jump(current[0] + dx, current[1] + dy, dx, dy, goal)
+                if jump_point is None or jump_point in closed:
                     continue
 
-                # ✋ Prevent diagonal clipping through corners
-                if dx != 0 and dy != 0:
-                    if not self.is_walkable(current[0] + dx, current[1]) or \
-                            not self.is_walkable(current[0], current[1] + dy):
-                        continue  # One of the sides is blocked
+                tentative_g = g_score[current] + self.heuristic(current, jump_point)
+                if jump_point not in g_score or tentative_g < g_score[jump_point]:
+                    came_from[jump_point] = current
+                    g_score[jump_point] = tentative_g
+                    h = self.heuristic(jump_point, goal)
+                    heapq.heappush(open_set, (tentative_g + h, h, jump_point))
 
-                move_cost = 14 if dx != 0 and dy != 0 else 10
-                tentative_g = g_score[current] + move_cost
+        return []
 
-                if neighbor not in g_score or tentative_g < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g
-                    f = tentative_g + self.heuristic(neighbor, goal)
-                    heapq.heappush(open_set, (f, self.heuristic(neighbor, goal), neighbor))
+    def _pruned_directions(self, node, parent):
+        x, y = node
+        if parent is None:
+            return [(nx - x, ny - y) for (nx, ny), _ in self.neighbors(node)]
 
-        return []
+        dx = (x > parent[0]) - (x < parent[0])
+        dy = (y > parent[1]) - (y < parent[1])
+        walkable = self.is_walkable
+        dirs = []
+
+        if dx != 0 and dy != 0:
+            if walkable(x, y + dy):
+                dirs.append((0, dy))
+            if walkable(x + dx, y):
+                dirs.append((dx, 0))
+            if walkable(x, y + dy) and walkable(x + dx, y):
+                dirs.append((dx, dy))
+        elif dx != 0:
+            ahead = walkable(x + dx, y)
+            for side in (1, -1):
+                if walkable(x, y + side):
+                    if ahead:
+                        dirs.append((dx, side))
+                    dirs.append((0, side))
+            if ahead:
+                dirs.append((dx, 0))
+        else:
+            ahead = walkable(x, y + dy)
+            for side in (1, -1):
+                if walkable(x + side, y):
+                    if ahead:
+                        dirs.append((side, dy))
+                    dirs.append((side, 0))
+            if ahead:
+                dirs.append((0, dy))
+        return dirs
+
+    def _jump(self, x, y, dx, dy, goal):
+        walkable = self.is_walkable
+        while True:
+            if not walkable(x, y):
+                return None
+            if (x, y) == goal:
+                return x, y
+
+            if dx != 0 and dy != 0:
+                # A diagonal step stops wherever a straight jump from it finds something
+                if self._jump(x + dx, y, dx, 0, goal) or self._jump(x, y + dy, 0, dy, goal):
+                    return x, y
+            elif dx != 0:
+                if (walkable(x, y - 1) and not walkable(x - dx, y - 1)) or \
+                        (walkable(x, y + 1) and not walkable(x - dx, y + 1)):
+                    return x, y
+            else:
+                if (walkable(x - 1, y) and not walkable(x - 1, y - dy)) or \
+                        (walkable(x + 1, y) and not walkable(x + 1, y - dy)):
+                    return x, y
+
+            # Same corner rule as neighbors(): both sides must be open to keep going diagonally
+            if not (walkable(x + dx, y) and walkable(x, y + dy)):
+                return None
+            x += dx
+            y += dy
+
+    def _expand_jump_path(self, jump_points):
+        # Fill in the straight/diagonal runs between jump points so callers get every tile
+        path = jump_points[:1]
+        for (x0, y0), (x1, y1) in zip(jump_points, jump_points[1:]):
+            dx = (x1 > x0) - (x1 < x0)
+            dy = (y1 > y0) - (y1 < y0)
+            x, y = x0, y0
+            while (x, y) != (x1, y1):
+                x += dx
+                y += dy
+                path.append((x, y))
+        return path
 
     def reconstruct_path(self, came_from, current):
         path = [current]
@@ -63,3 +382,505 @@ class AStarPathfinder:
             path.append(current)
         path.reverse()
         return path
+
+
+class FlowField:
+    """Dijkstra distances from one origin tile (the player), shared by every chasing enemy."""
+
+    def __init__(self, pathfinder, max_cost=None):
+        self.pathfinder = pathfinder
+        self.max_cost = max_cost
+        self.origin = None
+        self.dist = {}
+        self._built_for = None
+        pathfinder.map.change_listeners.append(self.on_tile_changed)
+
+    def on_tile_changed(self, x, y):
+        self._built_for = None
+
+    def set_origin(self, origin):
+        # The field is rebuilt lazily, on the first query after the origin moves
+        self.origin = origin
+
+    def _ensure_built(self):
+        if self._built_for == self.origin:
+            return
+        self._built_for = self.origin
+        self.dist = {}
+        if self.origin is None or not self.pathfinder.is_walkable(*self.origin):
+            return
+
+        self.dist[self.origin] = 0
+        frontier = [(0, self.origin)]
+        while frontier:
+            cost, current = heapq.heappop(frontier)
+            if cost > self.dist[current]:
+                continue
+            for neighbor, move_cost in self.pathfinder.neighbors(current):
+                new_cost = cost + move_cost
+                if self.max_cost is not None and new_cost > self.max_cost:
+                    continue
+                if new_cost < self.dist.get(neighbor, float("inf")):
+                    self.dist[neighbor] = new_cost
+                    heapq.heappush(frontier, (new_cost, neighbor))
+
+    def distance(self, tile):
+        self._ensure_built()
+        return self.dist.get(tile, float("inf"))
+
+    def next_step(self, tile):
+        self._ensure_built()
+        best, best_cost = None, self.dist.get(tile, float("inf"))
+        for neighbor, _ in self.pathfinder.neighbors(tile):
+            cost = self.dist.get(neighbor, float("inf"))
+            if cost < best_cost:
+                best, best_cost = neighbor, cost
+        return best
+
+    def path_from(self, start, arrived=None):
+        """Walk down the field from start until arrived(tile) or the origin; [] if unreachable."""
+        if self.distance(start) == float("inf"):
+            return []
+
+        path = [start]
+        current = start
+        while current != self.origin and not (arrived and arrived(current)):
+            current = self.next_step(current)
+            if current is None:
+                return []
+            path.append(current)
+        return path
+
+
+class HierarchicalPath:
+    """Abstract HPA* route; each hop is refined into tiles only when the walker reaches it."""
+
+    def __init__(self, planner, waypoints, hops):
+        self.planner = planner
+        self.waypoints = waypoints  # abstract tiles, start first
+        self.hops = hops            # cluster bounds for each intra hop, None for border crossings
+        self.index = 0
+
+    @property
+    def done(self):
+        return self.index >= len(self.hops)
+
+    def next_segment(self):
+        # Tiles of the next hop, without the tile the walker already stands on
+        if self.done:
+            return []
+        a, b = self.waypoints[self.index], self.waypoints[self.index + 1]
+        bounds = self.hops[self.index]
+        self.index += 1
+        if bounds is None:
+            return [b]
+        return self.planner.search_in_bounds(a, b, bounds)[1:]
+
+
+class HierarchicalPathfinder:
+    """HPA*: clusters with precomputed entrance graphs, layered on an AStarPathfinder."""
+
+    def __init__(self, pathfinder, cluster_size=Config.HPA_CLUSTER_SIZE):
+        self.pathfinder = pathfinder
+        self.cluster_size = cluster_size
+        self.edges = {}  # entrance tile -> [(neighbor tile, cost, bounds or None)]
+        self.cluster_entrances = {}  # (cx, cy) -> [entrance tiles]
+        self.rebuild()
+        pathfinder.map.change_listeners.append(self.on_tile_changed)
+
+    def on_tile_changed(self, x, y):
+        self.rebuild()
+
+    def rebuild(self):
+        self.edges = {}
+        self.cluster_entrances = {}
+        self._build_entrances()
+        for cluster, entrances in self.cluster_entrances.items():
+            bounds = self.cluster_bounds(cluster)
+            for entrance in entrances:
+                costs = self._costs_in_bounds(entrance, bounds)
+                for other in entrances:
+                    if other != entrance and other in costs:
+                        self.edges[entrance].append((other, costs[other], bounds))
+
+    def cluster_of(self, tile):
+        return tile[0] // self.cluster_size, tile[1] // self.cluster_size
+
+    def cluster_bounds(self, cluster):
+        x0, y0 = cluster[0] * self.cluster_size, cluster[1] * self.cluster_size
+        x1 = min(x0 + self.cluster_size, self.pathfinder.cols)
+        y1 = min(y0 + self.cluster_size, self.pathfinder.rows)
+        return x0, y0, x1, y1
+
+    def _add_entrance(self, a, b):
+        for tile in (a, b):
+            if tile not in self.edges:
+                self.edges[tile] = []
+                self.cluster_entrances.setdefault(self.cluster_of(tile), []).append(tile)
+        self.edges[a].append((b, 10, None))
+        self.edges[b].append((a, 10, None))
+
+    def _build_entrances(self):
+        walkable = self.pathfinder.is_walkable
+        size, rows, cols = self.cluster_size, self.pathfinder.rows, self.pathfinder.cols
+
+        def add_run(run):
+            # Long openings get a transition at each end, short ones one in the middle
+            if len(run) >= 6:
+                self._add_entrance(*run[0])
+                self._add_entrance(*run[-1])
+            elif run:
+                self._add_entrance(*run[len(run) // 2])
+
+        for bx in range(size - 1, cols - 1, size):  # vertical borders between clusters
+            for y0 in range(0, rows, size):
+                run = []
+                for y in range(y0, min(y0 + size, rows)):
+                    if walkable(bx, y) and walkable(bx + 1, y):
+                        run.append(((bx, y), (bx + 1, y)))
+                    else:
+                        add_run(run)
+                        run = []
+                add_run(run)
+
+        for by in range(size - 1, rows - 1, size):  # horizontal borders
+            for x0 in range(0, cols, size):
+                run = []
+                for x in range(x0, min(x0 + size, cols)):
+                    if walkable(x, by) and walkable(x, by + 1):
+                        run.append(((x, by), (x, by + 1)))
+                    else:
+                        add_run(run)
+                        run = []
+                add_run(run)
+
+    def _costs_in_bounds(self, start, bounds):
+        x0, y0, x1, y1 = bounds
+        costs = {start: 0}
+        frontier = [(0, start)]
+        while frontier:
+            cost, current = heapq.heappop(frontier)
+            if cost > costs[current]:
+                continue
+            for neighbor, move_cost in self.pathfinder.neighbors(current):
+                if not (x0 <= neighbor[0] < x1 and y0 <= neighbor[1] < y1):
+                    continue
+                new_cost = cost + move_cost
+                if new_cost < costs.get(neighbor, float("inf")):
+                    costs[neighbor] = new_cost
+                    heapq.heappush(frontier, (new_cost, neighbor))
+        return costs
+
+    def search_in_bounds(self, start, goal, bounds):
+        x0, y0, x1, y1 = bounds
+        heuristic = self.pathfinder.heuristic
+        open_set = [(0, 0, start)]
+        came_from = {}
+        g_score = {start: 0}
+        while open_set:
+            _, _, current = heapq.heappop(open_set)
+            if current == goal:
+                return self.pathfinder.reconstruct_path(came_from, current)
+            for neighbor, move_cost in self.pathfinder.neighbors(current):
+                if not (x0 <= neighbor[0] < x1 and y0 <= neighbor[1] < y1):
+                    continue
+                tentative_g = g_score[current] + move_cost
+                if tentative_g < g_score.get(neighbor, float("inf")):
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g
+                    h = heuristic(neighbor, goal)
+                    heapq.heappush(open_set, (tentative_g + h, h, neighbor))
+        return []
+
+    def is_long_range(self, start, goal):
+        return max(abs(start[0] - goal[0]), abs(start[1] - goal[1])) > self.cluster_size
+
+    def plan(self, start, goal):
+        """Abstract route from start to goal, or None if there is none."""
+        if not (self.pathfinder.is_walkable(*start) and self.pathfinder.is_walkable(*goal)):
+            return None
+        if not self.pathfinder.can_reach(start, goal):
+            return None
+
+        # Hook the endpoints into the entrance graph of their own clusters
+        extra = {}
+        start_bounds = self.cluster_bounds(self.cluster_of(start))
+        start_costs = self._costs_in_bounds(start, start_bounds)
+        extra[start] = [(e, start_costs[e], start_bounds)
+                        for e in self.cluster_entrances.get(self.cluster_of(start), []) if e in start_costs]
+        if goal in start_costs:
+            extra[start].append((goal, start_costs[goal], start_bounds))
+
+        goal_bounds = self.cluster_bounds(self.cluster_of(goal))
+        goal_costs = self._costs_in_bounds(goal, goal_bounds)
+        for e in self.cluster_entrances.get(self.cluster_of(goal), []):
+            if e in goal_costs:
+                extra.setdefault(e, []).append((goal, goal_costs[e], goal_bounds))
+
+        heuristic = self.pathfinder.heuristic
+        open_set = [(0, 0, start)]
+        came_from = {}
+        g_score = {start: 0}
+        while open_set:
+            _, _, current = heapq.heappop(open_set)
+            if current == goal:
+                break
+            for neighbor, cost, bounds in self.edges.get(current, []) + extra.get(current, []):
+                tentative_g = g_score[current] + cost
+                if tentative_g < g_score.get(neighbor, float("inf")):
+                    came_from[neighbor] = (current, bounds)
+                    g_score[neighbor] = tentative_g
+                    h = heuristic(neighbor, goal)
+                    heapq.heappush(open_set, (tentative_g + h, h, neighbor))
+        else:
+            return None
+
+        waypoints, hops = [goal], []
+        node = goal
+        while node in came_from:
+            node, bounds = came_from[node]
+            waypoints.append(node)
+            hops.append(bounds)
+        waypoints.reverse()
+        hops.reverse()
+        return HierarchicalPath(self, waypoints, hops)
+
+
+class SearchTree:
+    """One owner's A* tree. g-values stay measured from the first root; a constant shift keeps them valid."""
+
+    def __init__(self, root):
+        self.root = root
+        self.g = {root: 0}
+        self.parent = {}
+        self.children = {}
+        self.closed = set()
+        self.open = {root}
+
+    def path_to(self, node):
+        path = [node]
+        while node != self.root:
+            node = self.parent[node]
+            path.append(node)
+        path.reverse()
+        return path
+
+
+class MovingTargetPlanner:
+    """Fringe-Retrieving A* (Sun, Yeoh & Koenig) for chasers: each owner's tree survives between calls.
+
+    When the owner has stepped onto a tile of its old tree, the subtree under that tile is kept
+    (its g-values are still optimal), the rest is dropped, and A* resumes from the kept tree's
+    open fringe toward the new goal. A goal already inside the tree needs no search at all, and
+    otherwise the work is proportional to the dropped part of the tree plus the fringe.
+    """
+
+    CHUNK = 64  # bookkeeping items (dropped nodes, fringe entries) handled per yield
+
+    def __init__(self, pathfinder):
+        self.pathfinder = pathfinder
+        self.trees = {}
+        self.last_expanded = 0
+        self.reused = 0
+        self.fresh = 0
+        self.generation = 0  # bumped on map edits, so trees grown before one are not put back
+        pathfinder.map.change_listeners.append(self.on_tile_changed)
+
+    def on_tile_changed(self, x, y):
+        self.trees.clear()
+        self.generation += 1
+
+    def forget(self, owner):
+        self.trees.pop(owner, None)
+
+    def replan(self, owner, start, goal):
+        return AStarPathfinder._drain(self.iter_replan(owner, start, goal))
+
+    def iter_replan(self, owner, start, goal):
+        """Resumable replan, like AStarPathfinder.iter_search: yields once per expanded node, and
+        every CHUNK items of rerooting, so a queue can spread it over frames.
+
+        The owner's tree is taken out while the search runs and put back when it finishes; a
+        request dropped half way (a newer one replaced it) leaves the owner to start a fresh tree.
+        """
+        self.last_expanded = 0
+        if not self.pathfinder.can_reach(start, goal):
+            return []
+
+        generation = self.generation
+        tree = self.trees.pop(owner, None)
+        if tree is None or start not in tree.closed:
+            tree = SearchTree(start)
+            self.fresh += 1
+        else:
+            if start != tree.root:
+                yield from self._reroot(tree, start)
+            self.reused += 1
+
+        if goal not in tree.closed:
+            yield from self._search(tree, goal)
+        if generation == self.generation:
+            self.trees[owner] = tree
+        return tree.path_to(goal) if goal in tree.closed else []
+
+    def _reroot(self, tree, root):
+        # Everything outside the subtree under the new root is deleted
+        deleted, stack = [], [tree.root]
+        while stack:
+            node = stack.pop()
+            deleted.append(node)
+            stack.extend(child for child in tree.children.pop(node, ()) if child != root)
+            if len(deleted) % self.CHUNK == 0:
+                yield
+        deleted_set = set(deleted)
+
+        tree.closed.difference_update(deleted_set)
+        del tree.parent[root]
+        tree.root = root
+
+        # Open nodes reached from a deleted node lose their g; the rest keep a valid bound
+        stale_open = [node for node in tree.open if tree.parent[node] in deleted_set]
+        tree.open.difference_update(stale_open)
+        for node in deleted + stale_open:
+            del tree.g[node]
+            if node != root:
+                tree.parent.pop(node, None)
+
+        # Re-insert dropped nodes that touch the kept tree, at their best g through it
+        closed, g_score = tree.closed, tree.g
+        for i, node in enumerate(deleted + stale_open, 1):
+            if i % self.CHUNK == 0:
+                yield
+            for neighbor, move_cost in self.pathfinder.neighbors(node):
+                if neighbor in closed:
+                    tentative_g = g_score[neighbor] + move_cost
+                    if tentative_g < g_score.get(node, float("inf")):
+                        g_score[node] = tentative_g
+                        tree.parent[node] = neighbor
+                        tree.open.add(node)
+
+    def _search(self, tree, goal):
+        heuristic = self.pathfinder.heuristic
+        neighbors = self.pathfinder.neighbors
+        closed, open_nodes, g_score, parent, children = tree.closed, tree.open, tree.g, tree.parent, tree.children
+
+        # The fringe carries over from the last call; only its heuristic changes with the goal
+        open_set = []
+        for node in open_nodes:
+            h = heuristic(node, goal)
+            open_set.append((g_score[node] + h, h, node))
+            if len(open_set) % self.CHUNK == 0:
+                yield
+        heapq.heapify(open_set)
+
+        while open_set:
+            f, _, current = heapq.heappop(open_set)
+            if current in closed or f - heuristic(current, goal) != g_score[current]:
+                continue  # expanded already, or superseded by a cheaper entry
+            open_nodes.discard(current)
+            closed.add(current)
+            if current != tree.root:
+                children.setdefault(parent[current], []).append(current)
+            self.last_expanded += 1
+
+            # Relax the goal's neighbours too, so every closed node stays surrounded by the fringe
+            for neighbor, move_cost in neighbors(current):
+                if neighbor in closed:
+                    continue
+                tentative_g = g_score[current] + move_cost
+                if tentative_g < g_score.get(neighbor, float("inf")):
+                    g_score[neighbor] = tentative_g
+                    parent[neighbor] = current
+                    open_nodes.add(neighbor)
+                    h = heuristic(neighbor, goal)
+                    heapq.heappush(open_set, (tentative_g + h, h, neighbor))
+            yield
+            if current == goal:
+                return
+
+
+class PathRequest:
+    def __init__(self, owner, start, goal):
+        self.owner = owner
+        self.start = start
+        self.goal = goal
+        self.path = None
+        self.done = False
+        self.cancelled = False
+        self.steps = None  # resumable search, created when the request first runs
+
+
+class PathRequestQueue:
+    """Spreads pathfinding over frames: each run() spends at most a fixed node/time budget.
+
+    Given a MovingTargetPlanner, searches resume each owner's previous tree instead of starting over.
+    """
+
+    def __init__(self, pathfinder, node_budget=Config.PATH_BUDGET_NODES, time_budget_ms=Config.PATH_BUDGET_MS,
+                 replanner=None):
+        self.pathfinder = pathfinder
+        self.replanner = replanner
+        self.node_budget = node_budget
+        self.time_budget_ms = time_budget_ms
+        self.pending = deque()
+        self.by_owner = {}
+        self.last_expanded = 0  # nodes spent by the most recent run()
+
+    def request(self, owner, start, goal):
+        # A newer request from the same owner replaces the one still waiting
+        self.cancel(owner)
+
+        request = PathRequest(owner, start, goal)
+        cached = self.pathfinder.lookup(start, goal)
+        if cached is None and not self.pathfinder.can_reach(start, goal):
+            cached = []  # different regions: no search needed
+        if cached is not None:
+            request.path = cached
+            request.done = True
+            return request
+
+        self.by_owner[owner] = request
+        self.pending.append(request)
+        return request
+
+    def cancel(self, owner):
+        request = self.by_owner.pop(owner, None)
+        if request is not None:
+            request.cancelled = True
+
+    def run(self):
+        deadline = time.perf_counter() + self.time_budget_ms / 1000
+        budget = self.node_budget
+        self.last_expanded = 0
+
+        while self.pending and budget > 0:
+            request = self.pending[0]
+            if request.cancelled:
+                self.pending.popleft()
+                continue
+            if request.steps is None:
+                if self.replanner is not None:
+                    request.steps = self.replanner.iter_replan(request.owner, request.start, request.goal)
+                else:
+                    request.steps = self.pathfinder.iter_search(request.start, request.goal)
+
+            # Check the clock every few nodes rather than after each one
+            try:
+                for _ in range(min(budget, 8)):
+                    next(request.steps)
+                    budget -= 1
+                    self.last_expanded += 1
+            except StopIteration as done:
+                request.path = done.value
+                request.done = True
+                self.pathfinder.store(request.start, request.goal, request.path)
+                self.pending.popleft()
+                if self.by_owner.get(request.owner) is request:
+                    del self.by_owner[request.owner]
+
+            if time.perf_counter() >= deadline:
+                break
+
+    def shutdown(self):
+        self.pending.clear()
+        self.by_owner.clear()
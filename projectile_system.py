@@ -0,0 +1,273 @@
+import math
+import numpy as np
+from abyss_map import Map
+from abyss_projectile import first_impact
+from abyss_utils import TargetPack, circle_rects_collision
+
+
+class ProjectileSystem:
+    """Live projectiles as parallel arrays, advanced and hit-tested together each frame.
+
+    Projectile objects stay as thin views of their slot for drawing and for callers that
+    hold on to them; slots are compacted in firing order once hits are resolved.
+    """
+
+    BATCH_MIN = 128  # below this many live shots the array passes cost more than they save
+
+    def __init__(self, capacity=64, pool=None):
+        self.pool = pool  # spent projectiles go back here when given
+        self.capacity = capacity
+        self.count = 0
+        self.position = np.zeros((capacity, 2), dtype=np.float64)
+        self.direction = np.zeros((capacity, 2), dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.radius = np.zeros(capacity, dtype=np.float64)
+        self.damage = np.zeros(capacity, dtype=np.float64)
+        self.team = np.zeros(capacity, dtype=np.int32)
+        self.views = []  # slot -> Projectile
+        self.team_codes = {}  # team_id -> small int, so team checks are array compares
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        # No copy: nothing appends while the views are being drawn
+        return iter(self.views)
+
+    def _team_code(self, team_id):
+        return self.team_codes.setdefault(team_id, len(self.team_codes))
+
+    def _grow(self):
+        self.capacity *= 2
+        for name in ("position", "direction", "speed", "radius", "damage", "team"):
+            old = getattr(self, name)
+            new = np.zeros((self.capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def append(self, projectile):
+        if self.count == self.capacity:
+            self._grow()
+        i = self.count
+        self.position[i] = projectile.position
+        self.direction[i] = projectile.direction
+        self.speed[i] = projectile.speed
+        self.radius[i] = projectile.radius
+        self.damage[i] = projectile.damage
+        self.team[i] = self._team_code(projectile.caster.team_id)
+        self.views.append(projectile)
+        self.count += 1
+        projectile.attach(self, i)
+
+    def clear(self):
+        for view in self.views:
+            view.detach()
+            if self.pool is not None:
+                self.pool.release(view)
+        self.views.clear()
+        self.count = 0
+
+    def update(self, game_map, targets=(), spatial_hash=None):
+        """Advance every projectile one step and resolve its hits.
+
+        With a hash of every live entity, only the entities in buckets along the projectiles'
+        moves are packed, as Projectile.update does, so far-off (and sleeping) ones cost nothing.
+        """
+        n = self.count
+        if n == 0:
+            return
+        if n < self.BATCH_MIN:
+            # A handful of shots: step each view on its own, in firing order, as the batch would
+            for view in self.views:
+                view.update(game_map, targets, spatial_hash)
+            if not all(view.active for view in self.views):
+                self._compact()
+            return
+        start = self.position[:n].copy()
+        end = start + self.direction[:n] * self.speed[:n, None]
+        radius = self.radius[:n]
+
+        wall_t = self._sweep_walls(game_map, start, end, radius)
+        pairs = None
+        if spatial_hash is not None:
+            # Each shot is paired only with the entities in buckets along its own move
+            pad = (radius + 1)[:, None]
+            lo, hi = np.minimum(start, end) - pad, np.maximum(start, end) + pad
+            targets, shot_ids, target_ids = spatial_hash.candidate_pairs(
+                zip(lo[:, 0].tolist(), lo[:, 1].tolist(), hi[:, 0].tolist(), hi[:, 1].tolist()))
+            pairs = (np.array(shot_ids, dtype=np.int64), np.array(target_ids, dtype=np.int64))
+        pack = TargetPack(targets if pairs is not None else [target for target in targets if target])
+        live = pack.entities
+        target_t, target_index = self._sweep_targets(pack, start, end, radius, pairs)
+
+        # Resolve in firing order, as the per-projectile loop did: a target killed by an
+        # earlier shot this frame is no longer there for the later ones
+        hit_any = False
+        for i in np.flatnonzero(np.isfinite(wall_t) | np.isfinite(target_t)):
+            view = self.views[i]
+            s, e = (float(start[i, 0]), float(start[i, 1])), (float(end[i, 0]), float(end[i, 1]))
+            if wall_t[i] <= target_t[i]:
+                hit = (float(wall_t[i]), None)
+            elif live[target_index[i]].state != "dead":
+                hit = (float(target_t[i]), live[target_index[i]])
+            else:
+                hit = first_impact(s, e, view.radius, view.caster.team_id, game_map, live)
+                if hit is None:
+                    continue
+            t, target = hit
+            view.impact_time = t
+            end[i] = (s[0] + (e[0] - s[0]) * t, s[1] + (e[1] - s[1]) * t)
+            view.active = False
+            view.apply_hit(target)
+            hit_any = True
+
+        self.position[:n] = end
+        if hit_any:
+            self._compact()
+
+    def _sweep_walls(self, game_map, start, end, radius):
+        """Entry time of each projectile's box into the first wall tile in its path, inf if none.
+
+        Tiles rather than merged colliders: a merged rect covers exactly its tiles, so the
+        earliest entry is the same either way.
+        """
+        ts = game_map.tile_size
+        n = len(start)
+        pad = radius + 1
+        lo = np.minimum(start, end) - pad[:, None]
+        hi = np.maximum(start, end) + pad[:, None]
+        x0, y0 = np.floor(lo[:, 0] / ts).astype(np.int64), np.floor(lo[:, 1] / ts).astype(np.int64)
+        x1, y1 = np.floor(hi[:, 0] / ts).astype(np.int64), np.floor(hi[:, 1] / ts).astype(np.int64)
+        span = int(max((x1 - x0).max(), (y1 - y0).max())) + 1
+
+        # Every tile of every projectile's swept box, masked down to in-bounds walls
+        oy, ox = np.divmod(np.arange(span * span), span)
+        tx = x0[:, None] + ox[None, :]
+        ty = y0[:, None] + oy[None, :]
+        inside = (tx <= x1[:, None]) & (ty <= y1[:, None]) & (tx >= 0) & (ty >= 0)
+        inside &= (tx < game_map.cols) & (ty < game_map.rows)
+        wall = np.zeros_like(inside)
+        wall[inside] = game_map.codes[ty[inside], tx[inside]] == ord(Map.WALL)
+        rows, cols = np.nonzero(wall)
+        t = np.full(n, math.inf)
+        if len(rows) == 0:
+            return t
+
+        # Strict slab test, as sweep_box_rect, over every (projectile, wall tile) pair
+        left = tx[rows, cols].astype(np.float64) * ts
+        top = ty[rows, cols].astype(np.float64) * ts
+        half = radius[rows]
+        t_hit = _slab_enter(start[rows], end[rows],
+                            left - half, left + ts + half, top - half, top + ts + half, strict=True)
+        np.minimum.at(t, rows, t_hit)
+        return t
+
+    def _sweep_targets(self, pack, start, end, radius, pairs=None):
+        """First time each projectile's circle touches a live enemy-team target, and that target's index.
+
+        pairs, (projectile indices, target indices), limits the test to those pairs; otherwise every
+        projectile is checked against every target.
+        """
+        n = len(start)
+        t = np.full(n, math.inf)
+        index = np.zeros(n, dtype=np.int64)
+        if not len(pack):
+            return t, index
+
+        left, top, right, bottom = pack.rects()
+        names, inverse = np.unique(pack.teams, return_inverse=True)
+        teams = np.array([self._team_code(name) for name in names.tolist()])[inverse]
+
+        # (projectile, target) pairs whose boxes meet over the move, dead and same-team pairs dropped
+        lo = np.minimum(start, end) - radius[:, None]
+        hi = np.maximum(start, end) + radius[:, None]
+        if pairs is None:
+            pi, ti = np.nonzero(np.ones((n, len(pack)), dtype=bool))
+        else:
+            pi, ti = pairs
+        near = ((lo[pi, 0] <= right[ti]) & (hi[pi, 0] >= left[ti])
+                & (lo[pi, 1] <= bottom[ti]) & (hi[pi, 1] >= top[ti]))
+        keep = near & pack.alive[ti] & (self.team[:n][pi] != teams[ti])
+        pi, ti = pi[keep], ti[keep]
+        if len(pi) == 0:
+            return t, index
+        s, e, r = start[pi], end[pi], radius[pi]
+        l, tp, rt, b = left[ti], top[ti], right[ti], bottom[ti]
+
+        # Already touching at the start
+        touching = circle_rects_collision((s[:, 0], s[:, 1]), r, l, tp, rt, b)
+
+        # Ray against the rect grown by radius; corner squares need the rounded-corner root
+        t_enter = _slab_enter(s, e, l - r, rt + r, tp - r, b + r, strict=False)
+        t_enter = np.maximum(t_enter, 0.0)
+        d = e - s
+        with np.errstate(invalid="ignore"):  # misses have t_enter inf; masked out below
+            x, y = s[:, 0] + d[:, 0] * t_enter, s[:, 1] + d[:, 1] * t_enter
+        on_face = ((l <= x) & (x <= rt)) | ((tp <= y) & (y <= b))
+        corner_x = np.where(x < l, l, rt)
+        corner_y = np.where(y < tp, tp, b)
+        fx, fy = s[:, 0] - corner_x, s[:, 1] - corner_y
+        qa = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]
+        qb = fx * d[:, 0] + fy * d[:, 1]
+        qc = fx * fx + fy * fy - r * r
+        disc = qb * qb - qa * qc
+        ok = (disc >= 0) & (qa != 0)
+        with np.errstate(invalid="ignore"):
+            root = (-qb - np.sqrt(np.where(ok, disc, 0.0))) / np.where(ok, qa, 1.0)
+        corner_t = np.where(ok & (root >= 0) & (root <= 1), root, math.inf)
+        hit_t = np.where(np.isfinite(t_enter), np.where(on_face, t_enter, corner_t), math.inf)
+        hit_t = np.where(touching, 0.0, hit_t)
+
+        # Earliest per projectile; on ties the first target in list order, like the scalar loop
+        order = np.lexsort((ti, hit_t, pi))
+        pi, ti, hit_t = pi[order], ti[order], hit_t[order]
+        first = np.ones(len(pi), dtype=bool)
+        first[1:] = pi[1:] != pi[:-1]
+        t[pi[first]] = hit_t[first]
+        index[pi[first]] = ti[first]
+        return t, index
+
+    def _compact(self):
+        # Survivors slide down over the spent slots in place, keeping firing order
+        views = self.views
+        keep = np.flatnonzero(np.fromiter((view.active for view in views), dtype=bool, count=len(views)))
+        for view in views:
+            if not view.active:
+                view.detach()
+                if self.pool is not None:
+                    self.pool.release(view)
+        k = len(keep)
+        for name in ("position", "direction", "speed", "radius", "damage", "team"):
+            arr = getattr(self, name)
+            arr[:k] = arr[keep]
+        for slot, i in enumerate(keep.tolist()):
+            views[slot] = views[i]
+            views[slot].slot = slot
+        del views[k:]
+        self.count = k
+
+
+def _slab_enter(start, end, left, right, top, bottom, strict):
+    """Vectorized slab entry time in [.., 1] for rays start -> end, inf where they miss.
+
+    strict follows sweep_box_rect (open box, t < 1), otherwise sweep_circle_rect (closed box).
+    """
+    t_enter = np.full(len(start), -math.inf)
+    t_exit = np.full(len(start), math.inf)
+    miss = np.zeros(len(start), dtype=bool)
+    for axis, lo, hi in ((0, left, right), (1, top, bottom)):
+        p, d = start[:, axis], end[:, axis] - start[:, axis]
+        still = d == 0
+        if strict:
+            miss |= still & ~((lo < p) & (p < hi))
+        else:
+            miss |= still & ~((lo <= p) & (p <= hi))
+        safe = np.where(still, 1.0, d)
+        t0, t1 = (lo - p) / safe, (hi - p) / safe
+        t0, t1 = np.where(still, -math.inf, np.minimum(t0, t1)), np.where(still, math.inf, np.maximum(t0, t1))
+        t_enter, t_exit = np.maximum(t_enter, t0), np.minimum(t_exit, t1)
+    if strict:
+        miss |= (t_enter >= t_exit) | (t_exit <= 0) | (t_enter >= 1)
+        return np.where(miss, math.inf, np.maximum(t_enter, 0.0))
+    miss |= (t_enter > t_exit) | (t_enter > 1) | (t_exit < 0)
+    return np.where(miss, math.inf, t_enter)
@@ -0,0 +1,114 @@
+from config import Config
+from abyss_utils import circle_rect_collision, grid_cells_near_segment
+
+
+class SpatialHash:
+    """Uniform grid of tile-sized buckets holding entities by their rect, updated as they move."""
+
+    def __init__(self, cell_size=Config.TILE_SIZE):
+        self.cell_size = cell_size
+        self.buckets = {}  # (bx, by) -> {entity: None}
+        self.cells = {}  # entity -> (bx0, by0, bx1, by1), inclusive bucket range
+        self.order = {}  # entity -> insertion number; queries answer in insertion order
+        self._inserted = 0
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, entity):
+        return entity in self.cells
+
+    def _span(self, left, top, right, bottom):
+        cs = self.cell_size
+        return int(left // cs), int(top // cs), int(right // cs), int(bottom // cs)
+
+    def _rect_span(self, rect):
+        # Inclusive of right/bottom, matching circle_rect_collision
+        return self._span(rect.left, rect.top, rect.right, rect.bottom)
+
+    def _place(self, entity, span):
+        self.cells[entity] = span
+        bx0, by0, bx1, by1 = span
+        for by in range(by0, by1 + 1):
+            for bx in range(bx0, bx1 + 1):
+                self.buckets.setdefault((bx, by), {})[entity] = None
+
+    def _unplace(self, entity):
+        bx0, by0, bx1, by1 = self.cells.pop(entity)
+        for by in range(by0, by1 + 1):
+            for bx in range(bx0, bx1 + 1):
+                bucket = self.buckets[(bx, by)]
+                del bucket[entity]
+                if not bucket:
+                    del self.buckets[(bx, by)]
+
+    def insert(self, entity):
+        if entity in self.cells:
+            self.move(entity)
+            return
+        self.order[entity] = self._inserted
+        self._inserted += 1
+        self._place(entity, self._rect_span(entity.get_rect()))
+
+    def remove(self, entity):
+        if entity in self.cells:
+            self._unplace(entity)
+            del self.order[entity]
+
+    def move(self, entity):
+        span = self._rect_span(entity.get_rect())
+        if self.cells.get(entity) == span:
+            return  # still in the same buckets
+        self._unplace(entity)
+        self._place(entity, span)
+
+    def candidates(self, left, top, right, bottom):
+        """Entities in any bucket touching the box, in insertion order; no exact test."""
+        bx0, by0, bx1, by1 = self._span(left, top, right, bottom)
+        found = {}
+        for by in range(by0, by1 + 1):
+            for bx in range(bx0, bx1 + 1):
+                bucket = self.buckets.get((bx, by))
+                if bucket:
+                    found.update(bucket)
+        return sorted(found, key=self.order.__getitem__)
+
+    def candidate_pairs(self, boxes):
+        """Every (box, entity) pair whose entity sits in a bucket touching the box; no exact test.
+
+        Returns the entities involved in insertion order, and for each pair the box's index and
+        the entity's index in that list.
+        """
+        buckets = self.buckets
+        box_ids, found_entities = [], []
+        for i, box in enumerate(boxes):
+            bx0, by0, bx1, by1 = self._span(*box)
+            found = {}
+            for by in range(by0, by1 + 1):
+                for bx in range(bx0, bx1 + 1):
+                    bucket = buckets.get((bx, by))
+                    if bucket:
+                        found.update(bucket)
+            box_ids.extend([i] * len(found))
+            found_entities.extend(found)
+        entities = sorted(set(found_entities), key=self.order.__getitem__)
+        column = {entity: j for j, entity in enumerate(entities)}
+        return entities, box_ids, [column[entity] for entity in found_entities]
+
+    def candidates_near_segment(self, start, end, pad):
+        """Entities in the buckets within pad of the segment, in insertion order; no exact test."""
+        found = {}
+        for cell in grid_cells_near_segment(start, end, pad, self.cell_size):
+            bucket = self.buckets.get(cell)
+            if bucket:
+                found.update(bucket)
+        return sorted(found, key=self.order.__getitem__)
+
+    def query_rect(self, rect):
+        return [entity for entity in self.candidates(rect.left, rect.top, rect.right, rect.bottom)
+                if rect.colliderect(entity.get_rect())]
+
+    def query_circle(self, center, radius):
+        cx, cy = center
+        return [entity for entity in self.candidates(cx - radius, cy - radius, cx + radius, cy + radius)
+                if circle_rect_collision(center, radius, entity.get_rect())]